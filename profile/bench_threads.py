@@ -0,0 +1,55 @@
+"""Throughput of one shared generator as the number of threads grows.
+
+    PYTHONPATH=. python profile/bench_threads.py [max_threads] [renders_per_thread]
+
+Every thread renders from the same StringGenerator, whose randomizer is a
+ThreadLocalSecureRandom. On a standard CPython build the GIL serializes the
+pure-Python work, so expect throughput to stay flat; on a free-threaded build
+(python3.13t and later) it should grow with the thread count, since threads
+never contend for the randomizer's buffer.
+"""
+
+import sys
+import threading
+import time
+
+from strgen import StringGenerator as SG
+
+PATTERN = r"[\w]{32}"
+
+
+def run(threads, renders):
+    sg = SG(PATTERN, randomizer=SG.ThreadLocalSecureRandom())
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(renders):
+            sg.render()
+
+    pool = [threading.Thread(target=work) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    return threads * renders / (time.perf_counter() - start)
+
+
+def main():
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    renders = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, pattern {PATTERN}")
+    base = None
+    threads = 1
+    while threads <= max_threads:
+        rate = run(threads, renders)
+        base = base or rate
+        print(f"{threads:3d} threads: {rate:12,.0f} renders/s  ({rate / base:.2f}x)")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Scaling of StringGenerator.render_list(unique=True).
+
+    PYTHONPATH=. python profile/bench_unique_list.py [largest count]
+
+Renders unique lists of doubling length, with and without a progress
+callback, and reports the time per string. The time per string should stay
+flat as the list grows; it would grow with the length if the uniqueness
+check scanned the list.
+"""
+
+import sys
+import time
+
+from strgen import StringGenerator as SG
+
+PATTERN = r"[\u\d]{12}"
+
+
+def bench(cnt, progress_callback=None):
+    sg = SG(PATTERN, seed=1)
+    start = time.perf_counter()
+    result = sg.render_list(cnt, unique=True, progress_callback=progress_callback)
+    elapsed = time.perf_counter() - start
+    assert len(set(result)) == cnt
+    return elapsed
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    sizes = []
+    cnt = largest
+    while cnt >= 25_000:
+        sizes.insert(0, cnt)
+        cnt //= 2
+    print(f"{PATTERN}, unique=True")
+    print(f"{'count':>10s} {'us/string':>10s} {'with callback':>14s}")
+    first = None
+    for cnt in sizes:
+        plain = bench(cnt) / cnt * 1e6
+        callback = bench(cnt, lambda i, n: None) / cnt * 1e6
+        first = first or plain
+        print(f"{cnt:10,d} {plain:10.2f} {callback:14.2f}")
+    print(f"per-string time grew {plain / first:.2f}x over a {sizes[-1] // sizes[0]}x longer list")
+
+
+if __name__ == "__main__":
+    main()
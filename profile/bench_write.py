@@ -0,0 +1,43 @@
+"""Write throughput of StringGenerator.render_to_file().
+
+    PYTHONPATH=. python profile/bench_write.py [count]
+
+Writes count strings to /dev/null, to a temporary file and to a gzip file
+with each randomizer, and reports the rate in strings/s and GB/s
+(uncompressed bytes).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from strgen import StringGenerator as SG
+
+PATTERN = r"[\u\d]{16}"
+
+
+def bench(label, sg, target, cnt, **options):
+    start = time.perf_counter()
+    written = sg.render_to_file(target, cnt, **options)
+    elapsed = time.perf_counter() - start
+    print(f"{label:40s} {cnt / elapsed:14,.0f} strings/s  {written / elapsed / 1e9:7.3f} GB/s")
+
+
+def main():
+    cnt = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    print(f"{cnt:,} x {PATTERN}")
+    randomizers = [
+        ("seeded", lambda: SG(PATTERN, seed=1)),
+        ("BufferedSecureRandom", lambda: SG(PATTERN, randomizer=SG.BufferedSecureRandom())),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in randomizers:
+            bench(f"{name}, /dev/null", make(), os.devnull, cnt)
+            bench(f"{name}, file", make(), os.path.join(tmp, "out.txt"), cnt)
+            bench(f"{name}, gzip file", make(), os.path.join(tmp, "out.txt.gz"), cnt, compress="gzip")
+            bench(f"{name}, unique, file", make(), os.path.join(tmp, "out.txt"), cnt, unique=True)
+
+
+if __name__ == "__main__":
+    main()
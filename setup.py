@@ -39,6 +39,12 @@ setup(
     packages=[
         "strgen",
     ],
+    entry_points={
+        "console_scripts": ["strgen = strgen.cli:main"],
+    },
+    extras_require={
+        "numpy": ["numpy"],
+    },
     license="BSD",
     python_requires=">=3.7",
     classifiers=[
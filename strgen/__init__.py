@@ -31,15 +31,30 @@
 # Original author: paul.wolf@yewleaf.com
 
 
+import io
 import os
+import functools
+import gzip
 import random
+import hashlib
+import heapq
 import string
+import sys
+import tempfile
 import types
 import typing
 import math
+import mmap
+import struct
+import collections.abc
 import itertools
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, OrderedDict, deque, namedtuple
+from fractions import Fraction
 from math import factorial
 
 __version__ = "0.5.1"
@@ -65,13 +80,39 @@ def permutation_count(s):
     return factorial(len(s)) // c
 
 
+def expected_duplicates(cnt, space) -> float:
+    """Return the expected number of repeats among cnt uniform draws from space values.
+
+    This is the birthday bound: cnt minus the expected number of distinct
+    values, ``space * (1 - (1 - 1/space) ** cnt)``. For very large spaces the
+    first-order approximation ``cnt * (cnt - 1) / (2 * space)`` is used.
+    """
+    if cnt < 2 or space < 1:
+        return 0.0
+    if space > 1 << 53:
+        return cnt * (cnt - 1) / (2 * space)
+    return max(0.0, cnt - space * -math.expm1(cnt * math.log1p(-1 / space)))
+
+
+def import_numpy():
+    """Return the numpy module, or None if it is not installed.
+
+    NumPy is an optional dependency used only by the "numpy" backend.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
 def randomizer_factory(seed) -> random.Random:
     """Return class instance that will provide randint, choice, shuffle.
 
     If there is a seed, we need to use Random.
 
     """
-    if seed:
+    if seed is not None:
         return random.Random(seed)
     try:
         return random.SystemRandom()
@@ -79,6 +120,22 @@ def randomizer_factory(seed) -> random.Random:
         return random.Random()
 
 
+def derive_seed(seed, index) -> int:
+    """Return a 128-bit seed for chunk ``index`` of a job seeded with ``seed``.
+
+    Hashing the master seed with the chunk index gives every chunk of a
+    parallel job its own independent stream, while the same seed always gives
+    the same streams.
+    """
+    digest = hashlib.sha256(f"{seed!r}:{index}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:16], "big")
+
+
+# Whether os.register_at_fork() exists. Where it does, buffered randomizers are
+# reset in a forked child by a hook; elsewhere _take() compares PIDs instead.
+_FORK_HOOKS = hasattr(os, "register_at_fork")
+
+
 class BufferedSecureRandom(random.Random):
     """Cryptographically secure RNG that buffers ``os.urandom`` in bulk.
 
@@ -98,51 +155,169 @@ class BufferedSecureRandom(random.Random):
         SG(r"[\\w\\p]{32}", randomizer=SG.BufferedSecureRandom()).render_set(50000)
 
     Being entropy-based, it ignores seeding.
+
+    It is safe across ``fork()``: a child process discards any bytes its parent
+    had buffered, so prefork servers and multiprocessing pools never hand out
+    the same bytes in two processes. The reset runs from an
+    ``os.register_at_fork`` hook; where that is not available the owning PID
+    is checked on every draw instead.
     """
 
+    # Live instances, so a forked child can discard all inherited buffers.
+    _instances: "weakref.WeakSet[BufferedSecureRandom]" = weakref.WeakSet()
+
     def __init__(self, bufsize=1 << 20):
-        self._buf = b""
-        self._i = 0
         self._bufsize = bufsize
+        # for statistics: bytes fetched from os.urandom, bytes handed out, and
+        # characters drawn by choices()
+        self.bytes_read = 0
+        self.bytes_used = 0
+        self.symbols_drawn = 0
+        self._reset()
+        BufferedSecureRandom._instances.add(self)
         super().__init__()
 
+    def _reset(self):
+        """Discard all buffered bytes and take ownership for this process."""
+        self._buf = b""
+        self._i = 0
+        self._pid = os.getpid()
+
     def _take(self, n):
         """Return n fresh random bytes, refilling the buffer when needed."""
+        if not _FORK_HOOKS and self._pid != os.getpid():
+            self._reset()
         if self._i + n > len(self._buf):
             self._buf = os.urandom(max(n, self._bufsize))
+            self.bytes_read += len(self._buf)
             self._i = 0
         chunk = self._buf[self._i : self._i + n]
         self._i += n
+        self.bytes_used += n
         return chunk
 
+    def _count_symbols(self, k):
+        self.symbols_drawn += k
+
+    @property
+    def bytes_per_symbol(self) -> typing.Optional[float]:
+        """Random bytes used per character drawn by choices(), or None before any.
+
+        Other draws (randint(), shuffle(), ...) count towards the bytes too.
+        """
+        return self.bytes_used / self.symbols_drawn if self.symbols_drawn else None
+
     def random(self):
         """Return a 53-bit float in [0.0, 1.0), as SystemRandom.random does."""
         return (int.from_bytes(self._take(7), "big") >> 3) * (2.0**-53)
 
+    def randbytes(self, n):
+        """Return n random bytes straight from the buffer."""
+        return self._take(n)
+
     def getrandbits(self, k):
         if k <= 0:
             raise ValueError("number of bits must be greater than zero")
         nbytes = (k + 7) // 8
         return int.from_bytes(self._take(nbytes), "big") >> (nbytes * 8 - k)
 
+    def _randbelow(self, n):
+        """Return a uniform int in [0, n) from the fewest whole bytes that cover n.
+
+        Random's randrange(), choice(), sample() and shuffle() all draw
+        through this. A value at or above the largest multiple of n that fits
+        in those bytes would make the low results likelier, so it is rejected
+        and redrawn; that happens less than half the time.
+        """
+        nbytes = ((n - 1).bit_length() + 7) // 8
+        if nbytes <= 1:
+            limit = 256 - 256 % n
+            while True:
+                byte = self._take(1)[0]
+                if byte < limit:
+                    return byte % n
+        span = 1 << (8 * nbytes)
+        limit = span - span % n
+        while True:
+            value = int.from_bytes(self._take(nbytes), "big")
+            if value < limit:
+                return value % n
+
+    def randint(self, a, b):
+        """Return a random integer in [a, b], without randrange()'s argument handling."""
+        if b < a:
+            raise ValueError(f"empty range in randint({a}, {b})")
+        return a + self._randbelow(b - a + 1)
+
+    def choice(self, seq):
+        if not len(seq):
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self._randbelow(len(seq))]
+
+    def shuffle(self, x):
+        """Shuffle list x in place with Fisher-Yates.
+
+        For up to 256 items every index fits in one byte, so the swaps draw
+        from one slice of the buffer instead of a call per swap, rejecting
+        bytes as _randbelow() does.
+        """
+        n = len(x)
+        if n > 256:
+            randbelow = self._randbelow
+            for i in range(n - 1, 0, -1):
+                j = randbelow(i + 1)
+                x[i], x[j] = x[j], x[i]
+            return
+        data = self._take(2 * n)
+        pos = 0
+        for i in range(n - 1, 0, -1):
+            m = i + 1
+            limit = 256 - 256 % m
+            while True:
+                if pos == len(data):
+                    data = self._take(n)
+                    pos = 0
+                byte = data[pos]
+                pos += 1
+                if byte < limit:
+                    break
+            j = byte % m
+            x[i], x[j] = x[j], x[i]
+
     def choices(self, population, weights=None, *, cum_weights=None, k=1):
         """Unweighted draws map bytes straight to indices via rejection
         sampling, skipping the per-pick float construction in random(). This is
-        the hot path for character sets and is several times faster. Weighted
-        draws, an empty population, or alphabets larger than one byte fall back
-        to the standard implementation (which still uses our random()).
+        the hot path for character sets and is several times faster. Each
+        index is read from one byte for alphabets of up to 256 symbols, from
+        two bytes up to 65536 symbols (large Unicode ranges), and from four
+        above that. Weighted draws, an empty population, or populations of
+        more than 2**32 fall back to the standard implementation (which still
+        uses our random()).
         """
         n = len(population)
-        if weights is not None or cum_weights is not None or n == 0 or n > 256:
+        self._count_symbols(k)
+        if weights is not None or cum_weights is not None or n == 0 or n > 1 << 32:
             return super().choices(population, weights, cum_weights=cum_weights, k=k)
-        limit = 256 - (256 % n)  # largest multiple of n <= 256; reject above it for uniformity
         out = []
         append = out.append
         take = self._take
+        if n <= 256:
+            limit = 256 - (256 % n)  # largest multiple of n <= 256; reject above it for uniformity
+            while len(out) < k:
+                for byte in take(k - len(out)):
+                    if byte < limit:
+                        append(population[byte % n])
+                        if len(out) == k:
+                            break
+            return out
+        width, code = (2, "H") if n <= 1 << 16 else (4, "I")
+        span = 1 << (8 * width)
+        limit = span - (span % n)
         while len(out) < k:
-            for byte in take(k - len(out)):
-                if byte < limit:
-                    append(population[byte % n])
+            # native byte order: any order of uniform bytes is a uniform index
+            for value in memoryview(take(width * (k - len(out)))).cast(code):
+                if value < limit:
+                    append(population[value % n])
                     if len(out) == k:
                         break
         return out
@@ -156,6 +331,829 @@ class BufferedSecureRandom(random.Random):
     getstate = setstate = _notimplemented
 
 
+class _ThreadCounter:
+    """A ThreadLocalSecureRandom statistic: one count per thread, summed when read."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return sum(counts[self.index] for counts in list(obj._counts))
+
+    def __set__(self, obj, value):
+        for counts in list(obj._counts):
+            counts[self.index] = 0
+        obj._thread_counts()[self.index] = value
+
+
+class ThreadLocalSecureRandom(BufferedSecureRandom):
+    """BufferedSecureRandom that is safe to share between threads.
+
+    BufferedSecureRandom advances a single buffer without locking, so two
+    threads drawing at once can race and, at worst, hand out the same bytes
+    twice. This variant keeps one refill buffer per thread in a
+    ``threading.local``: every thread reads only bytes it fetched from
+    ``os.urandom`` itself, so threads never share a byte and the hot path
+    takes no lock. Share one generator between worker threads::
+
+        sg = SG(r"[\\w]{32}", randomizer=SG.ThreadLocalSecureRandom())
+
+    Each thread that draws allocates its own buffer of ``bufsize`` bytes, so
+    the default is smaller than BufferedSecureRandom's.
+    """
+
+    # Statistics are counted per thread, in a list in the thread's local
+    # state, and summed when read: shared counters would lose updates.
+    bytes_read = _ThreadCounter(0)
+    bytes_used = _ThreadCounter(1)
+    symbols_drawn = _ThreadCounter(2)
+
+    def __init__(self, bufsize=1 << 16):
+        self._counts: typing.List[typing.List[int]] = []
+        self._local = threading.local()
+        super().__init__(bufsize)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _thread_counts(self):
+        """Return the calling thread's [bytes_read, bytes_used, symbols_drawn]."""
+        try:
+            return self._local.counts
+        except AttributeError:
+            counts = self._local.counts = [0, 0, 0]
+            self._counts.append(counts)
+            return counts
+
+    def _count_symbols(self, k):
+        self._thread_counts()[2] += k
+
+    def _take(self, n):
+        """Return n fresh random bytes from the calling thread's buffer."""
+        if not _FORK_HOOKS and self._pid != os.getpid():
+            self._reset()
+        local = self._local
+        try:
+            buf, i, counts = local.buf, local.i, local.counts
+        except AttributeError:
+            buf, i, counts = b"", 0, self._thread_counts()
+        if i + n > len(buf):
+            buf = local.buf = os.urandom(max(n, self._bufsize))
+            counts[0] += len(buf)
+            i = 0
+        local.i = i + n
+        counts[1] += n
+        return buf[i : i + n]
+
+
+@functools.lru_cache(maxsize=64)
+def _digit_table(n):
+    """Return (d, table): table[i] is the d base-n digits of i, low first, for i < n**d <= 4096."""
+    d = 1
+    while n ** (d + 1) <= 4096:
+        d += 1
+    if d == 1:
+        return 1, None
+    return d, [tuple((i // n**j) % n for j in range(d)) for i in range(n**d)]
+
+
+def _radix_digits(draw, n, k, block_bits=1024) -> typing.List[int]:
+    """Return at least k uniform ints in range(n), peeled as base-n digits off random blocks.
+
+    ``draw(bits)`` must return a uniform random int below ``2**bits``. Each
+    block holds g digits, with g as large as leaves 16 bits of slack, so a
+    block is rejected (when it is at or above the largest multiple of
+    ``n**g`` below ``2**block_bits``) less than once in 65536 draws and every
+    accepted block gives g exactly uniform digits. All but 16 bits plus a
+    fraction of a digit of each block is used, where one byte per symbol
+    would waste ``8 - log2(n)`` bits and rejected bytes. Whole blocks are
+    returned, so the result may be longer than k.
+    """
+    block_bits = max(block_bits, 2 * n.bit_length() + 16)
+    g = max(1, int((block_bits - 16) / math.log2(n)))
+    while g > 1 and n**g > 1 << (block_bits - 16):
+        g -= 1
+    span = n**g
+    limit = ((1 << block_bits) // span) * span
+    # Split each block into chunks that fit a machine word, and each chunk into
+    # groups of d digits looked up in a table rather than divided out singly.
+    d, table = _digit_table(n)
+    group = n**d
+    per_chunk = max(1, int(60 / math.log2(group)))
+    h = per_chunk * d
+    chunk = n**h
+    out: typing.List[int] = []
+    extend = out.extend
+    while len(out) < k:
+        value = draw(block_bits)
+        if value >= limit:
+            continue
+        value %= span
+        for _ in range(g // h):
+            value, small = divmod(value, chunk)
+            for _ in range(per_chunk):
+                small, i = divmod(small, group)
+                if table is None:
+                    out.append(i)
+                else:
+                    extend(table[i])
+        for _ in range(g % h):
+            value, i = divmod(value, n)
+            out.append(i)
+    return out
+
+
+class PackedSecureRandom(BufferedSecureRandom):
+    """BufferedSecureRandom that packs several characters into each random byte.
+
+    BufferedSecureRandom.choices() spends a whole byte on every character and
+    rejects bytes above the largest multiple of the alphabet size, so a
+    digit costs 8 bits for 3.3 bits of entropy. This class reads 1024 bit
+    blocks instead and peels base-n digits off them, which uses all but a
+    few bits of each block: about 0.42 bytes per digit instead of 1.02, and
+    0.76 instead of 1 for ``[\\w]``. Digits left over from a block are kept,
+    per alphabet size, for the next call. The rest of the interface, and its
+    security, are those of BufferedSecureRandom; ``bytes_per_symbol`` reports
+    the saving.
+    """
+
+    def _reset(self):
+        super()._reset()
+        self._digits: typing.Dict[int, typing.List[int]] = {}
+
+    def _draw_bits(self, bits):
+        return int.from_bytes(self._take(bits // 8), "little")
+
+    def choices(self, population, weights=None, *, cum_weights=None, k=1):
+        n = len(population)
+        if weights is not None or cum_weights is not None or n < 2 or n > 1 << 32:
+            return super().choices(population, weights, cum_weights=cum_weights, k=k)
+        self._count_symbols(k)
+        pool = self._digits.setdefault(n, [])
+        if len(pool) < k:
+            pool.extend(_radix_digits(self._draw_bits, n, k - len(pool)))
+        digits = pool[len(pool) - k :]
+        del pool[len(pool) - k :]
+        return [population[d] for d in digits]
+
+
+class FastSeededRandom(random.Random):
+    """Seeded Mersenne Twister that draws characters from bulk random bits.
+
+    ``random.Random.choices()`` builds a float per pick
+    (``floor(random() * n)``), which bounds seeded generation of large
+    test-data sets. This class turns one ``getrandbits()`` integer into the
+    indices for a whole string or batch instead. For alphabets of up to 256
+    symbols each byte of it is an index, mapped and filtered with one
+    ``bytes.translate`` (bytes at or above the largest multiple of n are
+    rejected, so every index is exactly uniform). Character classes then skip
+    choices() and translate straight to text. Larger alphabets, where the
+    per-pick indexing costs as much as the float, weighted draws and
+    everything else are Random's own::
+
+        sg = SG(r"[\\u\\d]{16}", randomizer=SG.FastSeededRandom(42))
+
+    It is opt-in because its output differs from ``seed=``. For a given seed
+    it is reproducible across runs and platforms, but only for the same
+    version of this package. Like Random, it is not cryptographically
+    secure. Worker processes (``workers=``) derive their streams from the
+    seed passed to the constructor.
+    """
+
+    def seed(self, a=None, version=2):
+        # kept so that worker processes can derive their own streams from it
+        self._seed = a
+        super().seed(a, version)
+
+    def randbytes(self, n):
+        """Return n random bytes, as ``getrandbits(8 * n)`` in little-endian order."""
+        return self.getrandbits(8 * n).to_bytes(n, "little") if n else b""
+
+    def choices(self, population, weights=None, *, cum_weights=None, k=1):
+        n = len(population)
+        if weights is not None or cum_weights is not None or not 0 < n <= 256:
+            return super().choices(population, weights, cum_weights=cum_weights, k=k)
+        return list(map(population.__getitem__, _translate_bytes(self, *_index_table(n), k)))
+
+
+@functools.lru_cache(maxsize=64)
+def _index_table(n):
+    """Return the _translate_table() mapping random bytes to indices in range(n)."""
+    return _translate_table(bytes(range(n)))
+
+
+# Randomizers that draw raw bytes, which CharacterSet may map to characters
+# with bytes.translate. PackedSecureRandom is left out since it would lose its
+# packing; a plain seeded Random must keep its output.
+_TRANSLATE_RANDOMIZERS = (random.SystemRandom, BufferedSecureRandom, ThreadLocalSecureRandom, FastSeededRandom)
+
+
+def _translate_table(alphabet):
+    """Return (table, delete) for drawing from alphabet with bytes.translate, or None.
+
+    alphabet holds one byte per symbol. The table maps byte b to
+    ``alphabet[b % n]``; the bytes at or above the largest multiple of n
+    below 256 are deleted, so each kept byte picks a symbol uniformly. Only
+    alphabets of up to 256 symbols fit.
+    """
+    n = len(alphabet)
+    if not 0 < n <= 256:
+        return None
+    limit = 256 - 256 % n
+    table = bytes(alphabet[b % n] for b in range(256))
+    return table, bytes(range(limit, 256))
+
+
+def _translate_choices(randomizer, table, delete, k):
+    """Return k latin-1 characters drawn by _translate_bytes()."""
+    return _translate_bytes(randomizer, table, delete, k).decode("latin-1")
+
+
+def _translate_bytes(randomizer, table, delete, k):
+    """Return k symbols drawn by translating random bytes through table.
+
+    Equivalent to ``b"".join(randomizer.choices(alphabet, k=k))`` for a
+    randomizer in _TRANSLATE_RANDOMIZERS, with the per-symbol loop done in C.
+    """
+    if type(randomizer) is random.SystemRandom:
+        randbytes = os.urandom
+    else:
+        randbytes = randomizer.randbytes
+        if isinstance(randomizer, BufferedSecureRandom):
+            randomizer._count_symbols(k)
+    keep = 256 - len(delete)
+    parts = []
+    have = 0
+    while have < k:
+        need = k - have
+        # ask for enough bytes that the rejected ones rarely leave us short
+        chunk = randbytes(need + need * len(delete) // keep + (1 if delete else 0)).translate(table, delete)
+        parts.append(chunk)
+        have += len(chunk)
+    text = parts[0] if len(parts) == 1 else b"".join(parts)
+    return text[:k]
+
+
+def _reset_randomizers_after_fork():
+    """Discard every buffered randomizer's inherited bytes in a forked child."""
+    for randomizer in list(BufferedSecureRandom._instances):
+        randomizer._reset()
+
+
+if _FORK_HOOKS:
+    os.register_at_fork(after_in_child=_reset_randomizers_after_fork)
+
+
+class FeistelPermutation:
+    """A keyed pseudorandom permutation of ``range(domain)``.
+
+    A balanced Feistel network over the smallest even number of bits that
+    covers the domain, with keyed BLAKE2b as the round function, is a
+    permutation of that bit space. Values that land outside the domain are
+    encrypted again ("cycle walking") until they land inside it, which
+    restricts the permutation to ``range(domain)``. Since the bit space is
+    less than four times the domain, that takes fewer than four passes on
+    average.
+
+    Mapping ``0, 1, 2, ...`` through the permutation yields distinct values in
+    an order that cannot be predicted without the key, in O(1) memory.
+    """
+
+    def __init__(self, domain, key: bytes, rounds=6):
+        self.domain = domain
+        bits = max(2, (domain - 1).bit_length())
+        self.half = (bits + 1) // 2
+        self.mask = (1 << self.half) - 1
+        self.nbytes = (self.half + 7) // 8
+        self.rounds = rounds
+        key = hashlib.sha256(key).digest()
+        # one keyed hash per round and output block, already fed the round
+        # and block numbers; each evaluation copies one and adds the input
+        blocks = -(-self.nbytes // 64)
+        self._hashes = [
+            [hashlib.blake2b(bytes((r, b)), key=key, digest_size=min(64, self.nbytes)) for b in range(blocks)]
+            for r in range(rounds)
+        ]
+        self._round_hashes = [blocks[0] for blocks in self._hashes]
+
+    def _f(self, r, x):
+        """The round function: BLAKE2b keyed on the permutation's key."""
+        data = x.to_bytes(self.nbytes, "big")
+        out = b""
+        for base in self._hashes[r]:
+            h = base.copy()
+            h.update(data)
+            out += h.digest()
+        return int.from_bytes(out[: self.nbytes], "big") & self.mask
+
+    def __call__(self, i):
+        if not 0 <= i < self.domain:
+            raise IndexError(f"{i} is outside range({self.domain})")
+        half, mask, nbytes, from_bytes = self.half, self.mask, self.nbytes, int.from_bytes
+        if nbytes > 64:
+            f = self._f
+            while True:
+                left, right = i >> half, i & mask
+                for r in range(self.rounds):
+                    left, right = right, left ^ f(r, right)
+                i = (left << half) | right
+                if i < self.domain:
+                    return i
+        # the usual case, one hash block per round, with _f() inlined
+        hashes = self._round_hashes
+        while True:
+            left, right = i >> half, i & mask
+            for base in hashes:
+                h = base.copy()
+                h.update(right.to_bytes(nbytes, "big"))
+                left, right = right, left ^ (from_bytes(h.digest(), "big") & mask)
+            i = (left << half) | right
+            if i < self.domain:
+                return i
+
+
+class BloomFilter:
+    """A compact, approximate set of strings for deduplicating huge streams.
+
+    The filter is a bit array sized from the expected number of items and the
+    acceptable false-positive rate: about ``-log(fp_rate) / log(2)**2`` bits
+    per item, so 2.7 GB for 500 million items at ``fp_rate=1e-9`` where a
+    ``set`` of 16 character strings would need tens of GB. Each item sets
+    ``hashes`` bits, picked by double hashing one BLAKE2b digest.
+
+    There are no false negatives: an item that was added is always reported
+    as seen. A false positive reports an unseen item as seen, which for a
+    unique stream only costs a re-draw, never a duplicate.
+    """
+
+    def __init__(self, capacity, fp_rate=1e-9):
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the bit array, in bytes."""
+        return len(self._array)
+
+    @staticmethod
+    def _digest(item) -> bytes:
+        return hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+
+    def _positions(self, item):
+        digest = self._digest(item)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        # wrap at 64 bits, as the vectorized add_many() does
+        return [((h1 + i * h2) & 0xFFFFFFFFFFFFFFFF) % bits for i in range(self.hashes)]
+
+    def __contains__(self, item) -> bool:
+        array = self._array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item) -> bool:
+        """Add item; return True if it was not (as far as the filter can tell) seen before."""
+        array = self._array
+        new = False
+        for pos in self._positions(item):
+            byte = array[pos >> 3]
+            bit = 1 << (pos & 7)
+            if not byte & bit:
+                array[pos >> 3] = byte | bit
+                new = True
+        self._count += new
+        return new
+
+    def add_many(self, items) -> typing.List:
+        """Add items; return those not seen before, in order and without repeats.
+
+        With NumPy installed, the bit positions of the whole batch are
+        computed and tested at once, which is many times faster than add()
+        per item. Items are compared exactly within the batch, so the only
+        false positives are against earlier batches.
+        """
+        numpy = import_numpy()
+        if numpy is None:
+            return [item for item in items if self.add(item)]
+        items = list(dict.fromkeys(items))
+        if not items:
+            return items
+        digest = self._digest
+        hashed = numpy.frombuffer(b"".join([digest(item) for item in items]), dtype="<u8").reshape(-1, 2)
+        h1 = hashed[:, :1]
+        h2 = hashed[:, 1:] | numpy.uint64(1)
+        rounds = numpy.arange(self.hashes, dtype=numpy.uint64)
+        pos = (h1 + rounds * h2) % numpy.uint64(self.bits)
+        array = numpy.frombuffer(self._array, dtype=numpy.uint8)
+        index = (pos >> numpy.uint64(3)).astype(numpy.intp)
+        bit = numpy.left_shift(numpy.uint8(1), (pos & numpy.uint64(7)).astype(numpy.uint8))
+        new = ~(array[index] & bit).astype(bool).all(axis=1)
+        numpy.bitwise_or.at(array, index[new].ravel(), bit[new].ravel())
+        self._count += int(new.sum())
+        return [item for item, fresh in zip(items, new.tolist()) if fresh]
+
+    def update(self, items) -> int:
+        """Add every item; return how many were new."""
+        return len(self.add_many(items))
+
+    def __len__(self):
+        """The number of items added and reported as new."""
+        return self._count
+
+
+class ExclusionStore:
+    """An on-disk set of strings, for keeping batches disjoint from earlier ones.
+
+    The store is a file holding an open-addressing hash table (linear
+    probing) of 16-byte BLAKE2b digests, accessed through mmap. A membership
+    test or insert reads a slot or two, so it takes O(1) time however much
+    history the file holds, and only the pages touched are loaded into
+    memory. The table doubles, rewriting the file, when it is half full.
+    Pass it as ``exclude=`` to render_set() or render_unique(), and add each
+    new batch with update()::
+
+        with SG.ExclusionStore("issued.sgx") as issued:
+            wave = sg.render_set(100000, exclude=issued)
+            issued.update(wave)
+
+    Only digests are stored, so the strings cannot be read back, and two
+    different strings would have to share a 128 bit digest to be confused.
+    Changes are written through the mapping as they are made; close() (or
+    leaving the ``with`` block) flushes them to disk. A store must not be
+    written by two processes at once.
+    """
+
+    _magic = b"SGEXCL\x00\x01"
+    _header = struct.Struct("<8sQQ8x")  # magic, slot count, item count
+    _empty = bytes(16)
+
+    def __init__(self, path, capacity=1 << 16):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, 1 << max(4, (2 * capacity - 1).bit_length()))
+        self._open()
+
+    def _create(self, path, slots):
+        with open(path, "wb") as f:
+            f.write(self._header.pack(self._magic, slots, 0))
+            f.truncate(self._header.size + 16 * slots)
+
+    def _open(self):
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self._slots, self._count = self._header.unpack_from(self._map)
+        if magic != self._magic or len(self._map) != self._header.size + 16 * self._slots:
+            self.close()
+            raise ValueError(f"{self.path} is not an ExclusionStore file")
+
+    @staticmethod
+    def _digest(item) -> bytes:
+        digest = hashlib.blake2b(item.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        # an all-zero slot marks an empty one
+        return digest if any(digest) else b"\x00" * 15 + b"\x01"
+
+    def _find(self, digest):
+        """Return the offset of digest's slot, or of the empty slot where it belongs, and whether it is there."""
+        table = self._map
+        mask = self._slots - 1
+        base = self._header.size
+        i = int.from_bytes(digest[:8], "little") & mask
+        while True:
+            offset = base + 16 * i
+            slot = table[offset : offset + 16]
+            if slot == digest:
+                return offset, True
+            if slot == self._empty:
+                return offset, False
+            i = (i + 1) & mask
+
+    def __contains__(self, item) -> bool:
+        return self._find(self._digest(item))[1]
+
+    def add(self, item) -> bool:
+        """Add item; return True if it was not already in the store."""
+        digest = self._digest(item)
+        offset, found = self._find(digest)
+        if found:
+            return False
+        self._map[offset : offset + 16] = digest
+        self._count += 1
+        struct.pack_into("<Q", self._map, 16, self._count)
+        if 2 * self._count > self._slots:
+            self._grow()
+        return True
+
+    def update(self, items) -> int:
+        """Add every string in items; return how many were new."""
+        add = self.add
+        return sum(add(item) for item in items)
+
+    def _grow(self):
+        """Rewrite the table with twice as many slots."""
+        tmp = f"{self.path}.grow"
+        self._create(tmp, 2 * self._slots)
+        old, base = self._map, self._header.size
+        with open(tmp, "r+b") as f, mmap.mmap(f.fileno(), 0) as table:
+            mask = 2 * self._slots - 1
+            for offset in range(base, len(old), 16):
+                digest = old[offset : offset + 16]
+                if digest == self._empty:
+                    continue
+                i = int.from_bytes(digest[:8], "little") & mask
+                while table[base + 16 * i : base + 16 * i + 16] != self._empty:
+                    i = (i + 1) & mask
+                table[base + 16 * i : base + 16 * i + 16] = digest
+            struct.pack_into("<Q", table, 16, self._count)
+            table.flush()
+        self.close()
+        os.replace(tmp, self.path)
+        self._open()
+
+    def __len__(self):
+        return self._count
+
+    def flush(self):
+        """Write pending changes to disk."""
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Union:
+    """Membership in any of several containers, without merging them."""
+
+    def __init__(self, *containers):
+        self.containers = containers
+
+    def __contains__(self, item) -> bool:
+        return any(item in container for container in self.containers)
+
+
+class _Budget:
+    """A limit on the time and draws a unique generation loop may spend.
+
+    Loops consult it once per batch, never per string: spent() compares the
+    attempts so far and the clock with the limits, and size() caps the next
+    batch to the attempts left and to what is expected to fit in the time
+    left, going by the time per attempt measured between calls to spent().
+    """
+
+    def __init__(self, timeout=None, max_attempts=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_attempts = max_attempts
+        self._checked = (time.monotonic(), 0)
+        self._per_attempt = None
+
+    @property
+    def limited(self) -> bool:
+        return self.deadline is not None or self.max_attempts is not None
+
+    def spent(self, attempts) -> bool:
+        if self.max_attempts is not None and attempts >= self.max_attempts:
+            return True
+        if self.deadline is None:
+            return False
+        now = time.monotonic()
+        last, last_attempts = self._checked
+        if attempts > last_attempts:
+            self._per_attempt = (now - last) / (attempts - last_attempts)
+        self._checked = (now, attempts)
+        return now >= self.deadline
+
+    def size(self, n, attempts) -> int:
+        if self.max_attempts is not None:
+            n = min(n, self.max_attempts - attempts)
+        if self.deadline is not None:
+            if self._per_attempt is None:
+                n = min(n, 256)  # a first, small batch to time
+            elif self._per_attempt > 0:
+                n = min(n, int((self.deadline - time.monotonic()) / self._per_attempt) + 1)
+        return max(0, n)
+
+
+# Run files for StringGenerator.render_set_to_file(): one string per line, in
+# UTF-8, with backslash and newline escaped so that any string fits on a line.
+
+
+def _escape_line(s) -> str:
+    if "\\" in s or "\n" in s:
+        return s.replace("\\", "\\\\").replace("\n", "\\n")
+    return s
+
+
+def _unescape_line(s) -> str:
+    if "\\" not in s:
+        return s
+    return "\\".join(part.replace("\\n", "\n") for part in s.split("\\\\"))
+
+
+def _write_run(path, strings, chunk_size=65_536, mode="w"):
+    """Write an iterable of strings to a run file; return how many were written."""
+    written = 0
+    with open(path, mode, encoding="utf-8", errors="surrogatepass", newline="\n") as f:
+        for batch in _batched(strings, chunk_size):
+            data = "\n".join(batch)
+            if "\\" in data or data.count("\n") != len(batch) - 1:
+                data = "\n".join(map(_escape_line, batch))
+            f.write(data)
+            f.write("\n")
+            written += len(batch)
+    return written
+
+
+def _read_run(path) -> typing.Iterator[str]:
+    with open(path, encoding="utf-8", errors="surrogatepass", newline="\n") as f:
+        for line in f:
+            yield _unescape_line(line[:-1])
+
+
+def _batched(iterable, n) -> typing.Iterator[typing.List]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, n))
+        if not batch:
+            return
+        yield batch
+
+
+def _merge_runs(paths, directory, fan_in=64):
+    """Merge sorted run files into one, dropping duplicates; return (path, count).
+
+    At most fan_in files are open at once: larger sets of runs are merged in
+    several passes. The input files are deleted.
+    """
+    while True:
+        groups = [paths[i : i + fan_in] for i in range(0, len(paths), fan_in)]
+        merged = []
+        for group in groups:
+            fd, out = tempfile.mkstemp(dir=directory, suffix=".run")
+            os.close(fd)
+            unique = (s for s, _ in itertools.groupby(heapq.merge(*map(_read_run, group))))
+            count = _write_run(out, unique)
+            for path in group:
+                os.remove(path)
+            merged.append(out)
+        if len(merged) == 1:
+            return merged[0], count
+        paths = merged
+
+
+def _select(items, total, wanted, random) -> typing.Iterator:
+    """Yield a uniform random sample of wanted of the total items, in order.
+
+    Knuth's selection sampling (Algorithm S): one pass, no memory.
+    """
+    for item in items:
+        if not wanted:
+            return
+        if random() * total < wanted:
+            yield item
+            wanted -= 1
+        total -= 1
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class ParseCache:
+    """Bounded LRU cache of parsed templates, keyed by generator class and pattern.
+
+    A parse tree depends only on the pattern and the class that parsed it (a
+    subclass may override ``string_code`` or getCharacterRange()), and is
+    never modified after parsing, so one tree can be shared by any number of
+    generators of that class, each with its own randomizer. Lookups and insertions take a lock so the cache can be
+    used from several threads.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (tokens, tree) for key, or None."""
+        with self._lock:
+            try:
+                entry = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+_parse_cache = ParseCache()
+
+
+class TemplateCompiler:
+    """Turn a parse tree into one generated Python render function.
+
+    Walking the node tree costs a method call, a ``**kwargs`` dict and a
+    temporary list per node on every render. For short templates such as
+    ``[\\w]{8}-[\\d]{4}`` that dispatch is most of the work. The compiler asks
+    each node to ``emit()`` a Python expression, folds adjacent literals,
+    binds alphabets and the randomizer's methods as globals of the generated
+    code, and ``exec``s the result into a single function::
+
+        def _render(kw):
+            return _join((_join(_choices(_c0, k=8)), '-', _join(_choices(_c1, k=4))))
+
+    The generated code calls the randomizer exactly as the node tree does, in
+    the same order, so a seeded compiled generator produces the same strings
+    as an uncompiled one.
+
+    The randomizer's methods are bound at compile time; compile again after
+    replacing a generator's randomizer.
+    """
+
+    def __init__(self, randomizer):
+        self.randomizer = randomizer
+        self.namespace = {"_join": "".join}
+        self._ids = itertools.count()
+
+    def bind(self, value, prefix="c"):
+        """Make value available to the generated code; return its name."""
+        name = f"_{prefix}{next(self._ids)}"
+        self.namespace[name] = value
+        return name
+
+    def rng(self, method):
+        """Return the name bound to a randomizer method, binding it once."""
+        name = f"_{method}"
+        if name not in self.namespace:
+            self.namespace[name] = getattr(self.randomizer, method)
+        return name
+
+    def join(self, parts):
+        """Return an expression concatenating parts.
+
+        Each part is a ``(is_literal, value)`` pair: literal values are plain
+        strings and are folded together, other values are expressions.
+        """
+        folded = []
+        for is_literal, value in parts:
+            if is_literal and folded and folded[-1][0]:
+                folded[-1] = (True, folded[-1][1] + value)
+            elif not is_literal or value:
+                folded.append((is_literal, value))
+        exprs = [repr(value) if is_literal else value for is_literal, value in folded]
+        if not exprs:
+            return "''"
+        if len(exprs) == 1:
+            return exprs[0]
+        return "_join((%s,))" % ", ".join(exprs)
+
+    def function(self, node):
+        """Compile node into its own function of ``kw``; return its name."""
+        name = self.bind(None, "f")
+        source = f"def {name}(kw):\n    return {node.emit(self)}\n"
+        exec(source, self.namespace)
+        return name
+
+    def compile(self, node):
+        """Return a function ``render(kw)`` equivalent to ``node.render``."""
+        return self.namespace[self.function(node)]
+
+
 class StringGenerator:
     """Generate a randomized string of characters using a template.
 
@@ -191,13 +1189,27 @@ class StringGenerator:
 
     # Exposed here so callers can opt into the fast secure RNG without a second
     # import: SG(pattern, randomizer=SG.BufferedSecureRandom()).
+    BloomFilter = BloomFilter
     BufferedSecureRandom = BufferedSecureRandom
+    ExclusionStore = ExclusionStore
+    FastSeededRandom = FastSeededRandom
+    FeistelPermutation = FeistelPermutation
+    PackedSecureRandom = PackedSecureRandom
+    ThreadLocalSecureRandom = ThreadLocalSecureRandom
 
     class SyntaxError(Exception):
         """Catch syntax errors."""
 
     class UniquenessError(Exception):
-        """Catch when template can't generate required list count."""
+        """Catch when template can't generate required list count.
+
+        ``partial`` holds the strings produced before giving up, where there
+        are any, in the type the call would have returned.
+        """
+
+        def __init__(self, *args, partial=None):
+            super().__init__(*args)
+            self.partial = partial
 
     meta_chars = "[]{}()|&$"
     mytab = " " * 4
@@ -238,14 +1250,48 @@ class StringGenerator:
         def render(self, randomizer, **kwargs):
             pass
 
+        @abstractmethod
+        def render_many(self, randomizer, n, **kwargs):
+            """Return a list of n renderings, drawing randomness for the whole batch."""
+            pass
+
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            """Return a rendering encoded with encoding.
+
+            Nodes that can produce bytes without building a str override this
+            and render_many_bytes(); both draw randomness exactly as render()
+            and render_many() do.
+            """
+            return self.render(randomizer, **kwargs).encode(encoding)
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            """Return a list of n renderings encoded with encoding."""
+            return [s.encode(encoding) for s in self.render_many(randomizer, n, **kwargs)]
+
         @abstractmethod
         def count(self, randomizer, **kwargs):
             pass
 
+        @abstractmethod
+        def unranker(self, randomizer):
+            """Return a function mapping each integer in ``range(count())`` to
+            a distinct rendering of this node, in a stable order."""
+            pass
+
+        @abstractmethod
+        def iter_from(self, randomizer, i):
+            """Lazily yield the renderings from index i to the end, in unranker() order."""
+            pass
+
         @abstractmethod
         def dump(self):
             pass
 
+        @abstractmethod
+        def emit(self, compiler):
+            """Return a Python expression rendering this node; see TemplateCompiler."""
+            pass
+
     class Sequence:
         """Render a sequence of nodes from the template."""
 
@@ -256,6 +1302,26 @@ class StringGenerator:
         def render(self, randomizer, **kwargs):
             return "".join([x.render(randomizer, **kwargs) for x in self.seq])
 
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            return b"".join([x.render_bytes(randomizer, encoding, **kwargs) for x in self.seq])
+
+        def render_many(self, randomizer, n, **kwargs):
+            """Render each node for the whole batch, then join the columns row-wise."""
+            columns = [x.render_many(randomizer, n, **kwargs) for x in self.seq]
+            if not columns:
+                return [""] * n
+            if len(columns) == 1:
+                return columns[0]
+            return list(map("".join, zip(*columns)))
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            columns = [x.render_many_bytes(randomizer, n, encoding, **kwargs) for x in self.seq]
+            if not columns:
+                return [b""] * n
+            if len(columns) == 1:
+                return columns[0]
+            return list(map(b"".join, zip(*columns)))
+
         def count(self, randomizer, **kwargs):
             """This sequence of counts:
             P x P x P...
@@ -267,6 +1333,52 @@ class StringGenerator:
                 x *= i
             return x
 
+        def unranker(self, randomizer):
+            """Decode the index as a mixed-radix number, one digit per node;
+            the first node is the most significant digit."""
+            digits = [(node.count(randomizer), node.unranker(randomizer)) for node in reversed(self.seq)]
+
+            def unrank(i):
+                parts = []
+                for size, unrank_node in digits:
+                    i, digit = divmod(i, size)
+                    parts.append(unrank_node(digit))
+                return "".join(reversed(parts))
+
+            return unrank
+
+        def iter_from(self, randomizer, i):
+            """A mixed-radix counter: the first node is the outermost loop and
+            each later node restarts from its first value when the one before
+            it advances. Nothing is materialized beyond the current value."""
+            if not self.seq:
+                if i == 0:
+                    yield ""
+                return
+            head = self.seq[0]
+            rest = StringGenerator.Sequence(self.seq[1:])
+            q, r = divmod(i, rest.count(randomizer))
+            for value in head.iter_from(randomizer, q):
+                for tail in rest.iter_from(randomizer, r):
+                    yield value + tail
+                r = 0
+
+        def emit(self, compiler):
+            return compiler.join(self.emit_parts(compiler))
+
+        def emit_parts(self, compiler):
+            """Return (is_literal, value) parts, flattening nested sequences
+            so that literals on either side of a group can be folded."""
+            parts = []
+            for node in self.seq:
+                if type(node) is StringGenerator.Sequence:
+                    parts.extend(node.emit_parts(compiler))
+                elif isinstance(node, StringGenerator.Literal):
+                    parts.append((True, node.literal))
+                else:
+                    parts.append((False, node.emit(compiler)))
+            return parts
+
         def dump(self, level=-1):
             print((StringGenerator.mytab * level) + f"{self.__class__.__name__}")
             for s in self.seq:
@@ -280,9 +1392,62 @@ class StringGenerator:
 
             return self.seq[randomizer.randint(0, len(self.seq) - 1)].render(randomizer, **kwargs)
 
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            return self.seq[randomizer.randint(0, len(self.seq) - 1)].render_bytes(randomizer, encoding, **kwargs)
+
+        def render_many(self, randomizer, n, **kwargs):
+            """Pick a branch for every row in one draw, render each branch's
+            share of the batch in bulk and scatter the results back."""
+            out = [""] * n
+            for node, rows in self._branch_rows(randomizer, n):
+                for i, s in zip(rows, node.render_many(randomizer, len(rows), **kwargs)):
+                    out[i] = s
+            return out
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            out = [b""] * n
+            for node, rows in self._branch_rows(randomizer, n):
+                for i, s in zip(rows, node.render_many_bytes(randomizer, len(rows), encoding, **kwargs)):
+                    out[i] = s
+            return out
+
+        def _branch_rows(self, randomizer, n):
+            """Pick a branch for each of n rows; return (branch, rows) for the branches picked."""
+            picks = randomizer.choices(range(len(self.seq)), k=n)
+            positions = [[] for _ in self.seq]
+            for i, branch in enumerate(picks):
+                positions[branch].append(i)
+            return [(node, rows) for node, rows in zip(self.seq, positions) if rows]
+
         def count(self, randomizer, **kwargs):
             return sum([x.count(randomizer, **kwargs) for x in self.seq])
 
+        def unranker(self, randomizer):
+            """Branches are numbered one after another, in template order."""
+            branches = [(node.count(randomizer), node.unranker(randomizer)) for node in self.seq]
+
+            def unrank(i):
+                for size, unrank_branch in branches:
+                    if i < size:
+                        return unrank_branch(i)
+                    i -= size
+                raise IndexError("index out of range")
+
+            return unrank
+
+        def iter_from(self, randomizer, i):
+            for node in self.seq:
+                size = node.count(randomizer)
+                if i < size:
+                    yield from node.iter_from(randomizer, i)
+                    i = 0
+                else:
+                    i -= size
+
+        def emit(self, compiler):
+            branches = compiler.bind(tuple(compiler.namespace[compiler.function(x)] for x in self.seq), "or")
+            return f"{branches}[{compiler.rng('randint')}(0, {len(self.seq) - 1})](kw)"
+
         def dump(self, level=-1):
             print((StringGenerator.mytab * level) + repr(self))
             for s in self.seq:
@@ -305,6 +1470,22 @@ class StringGenerator:
             randomizer.shuffle(char_list)
             return "".join(char_list)
 
+        def render_many(self, randomizer, n, **kwargs):
+            shuffle = randomizer.shuffle
+            out = []
+            for row in StringGenerator.Sequence.render_many(self, randomizer, n, **kwargs):
+                char_list = list(row)
+                shuffle(char_list)
+                out.append("".join(char_list))
+            return out
+
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            # characters, not bytes, are shuffled, so encode the shuffled str
+            return self.render(randomizer, **kwargs).encode(encoding)
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            return [s.encode(encoding) for s in self.render_many(randomizer, n, **kwargs)]
+
         def count(self, randomizer, **kwargs):
             """Number of distinct outcomes of a permutation ('&') of the operands.
 
@@ -330,6 +1511,47 @@ class StringGenerator:
                 "the result would depend on the random draw"
             )
 
+        def unranker(self, randomizer):
+            """Distinct permutations of fixed operands, in lexicographic order.
+
+            As with count(), this is only defined when every operand is fixed.
+            """
+            self.count(randomizer)  # raises NotImplementedError unless every operand is fixed
+            chars = "".join(node.unranker(randomizer)(0) for node in self.seq)
+
+            def unrank(i):
+                remaining = Counter(chars)
+                out = []
+                for _ in range(len(chars)):
+                    for c in sorted(remaining):
+                        remaining[c] -= 1
+                        block = permutation_count(list(remaining.elements()))
+                        if i < block:
+                            out.append(c)
+                            if not remaining[c]:
+                                del remaining[c]
+                            break
+                        i -= block
+                        remaining[c] += 1
+                return "".join(out)
+
+            return unrank
+
+        def iter_from(self, randomizer, i):
+            return map(self.unranker(randomizer), range(i, self.count(randomizer)))
+
+        def emit(self, compiler):
+            if "_shuffled" not in compiler.namespace:
+                shuffle = compiler.randomizer.shuffle
+
+                def shuffled(s):
+                    char_list = list(s)
+                    shuffle(char_list)
+                    return "".join(char_list)
+
+                compiler.namespace["_shuffled"] = shuffled
+            return f"_shuffled({compiler.join(self.emit_parts(compiler))})"
+
         def dump(self, level=-1):
             print((StringGenerator.mytab * level) + repr(self))
             for s in self.seq:
@@ -346,13 +1568,36 @@ class StringGenerator:
 
         def __init__(self, chars):
             self.literal = chars  # a literal string
+            self._encoded = {}  # encoding -> encoded literal
 
         def render(self, randomizer, **kwargs):
             return self.literal
 
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            try:
+                return self._encoded[encoding]
+            except KeyError:
+                return self._encoded.setdefault(encoding, self.literal.encode(encoding))
+
+        def render_many(self, randomizer, n, **kwargs):
+            return [self.literal] * n
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            return [self.render_bytes(randomizer, encoding)] * n
+
         def count(self, randomizer, **kwargs):
             return 1
 
+        def unranker(self, randomizer):
+            literal = self.literal
+            return lambda i: literal
+
+        def iter_from(self, randomizer, i):
+            return iter([self.literal] if i == 0 else [])
+
+        def emit(self, compiler):
+            return repr(self.literal)
+
         def dump(self, level=0):
             print((StringGenerator.mytab * level) + repr(self))
 
@@ -372,6 +1617,13 @@ class StringGenerator:
                 self.cnt = int(cnt)
             except Exception as e:
                 raise e
+            # For secure randomizers a small latin-1 alphabet is drawn by
+            # translating random bytes, see _translate_choices().
+            try:
+                self._translate = _translate_table(chars.encode("latin-1"))
+            except UnicodeEncodeError:
+                self._translate = None
+            self._encoded = {}  # encoding -> (encoded alphabet, one byte each?, translate table)
 
         def render(self, randomizer, **kwargs):
             if self.start > -1:
@@ -379,10 +1631,82 @@ class StringGenerator:
             else:
                 cnt = self.cnt
 
+            if self._translate and type(randomizer) in _TRANSLATE_RANDOMIZERS:
+                return _translate_choices(randomizer, *self._translate, cnt)
             # choices() draws all cnt characters in a single C-level call, far
             # faster than one randint() per character for large outputs.
             return "".join(randomizer.choices(self.chars, k=cnt))
 
+        def render_bytes(self, randomizer, encoding, **kwargs):
+            cnt = randomizer.randint(self.start, self.cnt) if self.start > -1 else self.cnt
+            return self._draw_bytes(randomizer, encoding, cnt)
+
+        def _encode(self, encoding):
+            """Return (alphabet, single_byte, translate) for encoding, computed once.
+
+            A single-byte alphabet is kept as one bytes object: choices() then
+            picks ints, which bytes() packs faster than b"".join() concatenates
+            one-byte strings.
+            """
+            try:
+                return self._encoded[encoding]
+            except KeyError:
+                alphabet = [c.encode(encoding) for c in self.chars]
+                single_byte = all(len(c) == 1 for c in alphabet)
+                translate = None
+                if single_byte:
+                    alphabet = b"".join(alphabet)
+                    translate = _translate_table(alphabet)
+                return self._encoded.setdefault(encoding, (alphabet, single_byte, translate))
+
+        def _draw_bytes(self, randomizer, encoding, k):
+            """Return k random characters as bytes in encoding.
+
+            When every character encodes to a single byte -- any ASCII
+            alphabet in an ASCII compatible encoding -- secure randomizers
+            translate random bytes straight to the output, as render() does.
+            """
+            alphabet, single_byte, translate = self._encode(encoding)
+            if translate and type(randomizer) in _TRANSLATE_RANDOMIZERS:
+                return _translate_bytes(randomizer, *translate, k)
+            if single_byte:
+                return bytes(randomizer.choices(alphabet, k=k))
+            return b"".join(randomizer.choices(alphabet, k=k))
+
+        def render_many(self, randomizer, n, **kwargs):
+            """Draw the characters for all n strings in a single choices() call
+            and slice them apart. For a range quantifier all n lengths are
+            drawn up front, also in one call."""
+            if self._translate and type(randomizer) in _TRANSLATE_RANDOMIZERS:
+                draw = functools.partial(_translate_choices, randomizer, *self._translate)
+            else:
+
+                def draw(k):
+                    return "".join(randomizer.choices(self.chars, k=k))
+
+            return self._slice_rows(randomizer, n, draw, "")
+
+        def render_many_bytes(self, randomizer, n, encoding, **kwargs):
+            if not self._encode(encoding)[1]:
+                # rows of multi-byte characters cannot be sliced by length
+                return [s.encode(encoding) for s in self.render_many(randomizer, n)]
+            return self._slice_rows(randomizer, n, functools.partial(self._draw_bytes, randomizer, encoding), b"")
+
+        def _slice_rows(self, randomizer, n, draw, empty):
+            """Draw the text for n rows with one draw() call and slice it into rows."""
+            if self.start > -1:
+                lengths = randomizer.choices(range(self.start, self.cnt + 1), k=n)
+                ends = list(itertools.accumulate(lengths))
+                text = draw(ends[-1] if ends else 0)
+                return [text[end - length : end] for length, end in zip(lengths, ends)]
+            cnt = self.cnt
+            if cnt == 0:
+                return [empty] * n
+            text = draw(n * cnt)
+            if cnt == 1 and isinstance(text, str):
+                return list(text)
+            return [text[i : i + cnt] for i in range(0, n * cnt, cnt)]
+
         def count(self, randomizer, **kwargs):
             """Permutation with replacement.
             The cummulative sum of c ** r
@@ -393,6 +1717,72 @@ class StringGenerator:
             # range
             return sum([len(self.chars) ** r for r in range(self.start, self.cnt + 1)])
 
+        def unranker(self, randomizer):
+            """Shorter lengths come first; within a length the index is read
+            as a number in base len(chars), most significant character first."""
+            chars = self.chars
+            base = len(chars)
+            lengths = [self.cnt] if self.start < 0 else range(self.start, self.cnt + 1)
+            blocks = [(base**length, length) for length in lengths]
+
+            def unrank(i):
+                for size, length in blocks:
+                    if i < size:
+                        out = []
+                        for _ in range(length):
+                            i, digit = divmod(i, base)
+                            out.append(chars[digit])
+                        return "".join(reversed(out))
+                    i -= size
+                raise IndexError("index out of range")
+
+            return unrank
+
+        def iter_from(self, randomizer, i):
+            chars = self.chars
+            base = len(chars)
+            lengths = [self.cnt] if self.start < 0 else range(self.start, self.cnt + 1)
+            for length in lengths:
+                size = base**length
+                if i >= size:
+                    i -= size
+                    continue
+                if i == 0:
+                    # a whole length block: let itertools do the counting in C
+                    yield from map("".join, itertools.product(chars, repeat=length))
+                    continue
+                digits = []
+                for _ in range(length):
+                    i, digit = divmod(i, base)
+                    digits.append(digit)
+                digits.reverse()
+                current = [chars[d] for d in digits]
+                pos = 0
+                while pos >= 0:
+                    yield "".join(current)
+                    pos = length - 1
+                    while pos >= 0:
+                        digits[pos] += 1
+                        if digits[pos] < base:
+                            current[pos] = chars[digits[pos]]
+                            break
+                        digits[pos] = 0
+                        current[pos] = chars[0]
+                        pos -= 1
+                i = 0
+
+        def emit(self, compiler):
+            if self._translate and type(compiler.randomizer) in _TRANSLATE_RANDOMIZERS:
+                draw = compiler.bind(functools.partial(_translate_choices, compiler.randomizer, *self._translate), "t")
+                if self.start > -1:
+                    return f"{draw}({compiler.rng('randint')}({self.start}, {self.cnt}))"
+                return f"{draw}({self.cnt})"
+            chars = compiler.bind(self.chars)
+            choices = compiler.rng("choices")
+            if self.start > -1:
+                return f"_join({choices}({chars}, k={compiler.rng('randint')}({self.start}, {self.cnt})))"
+            return f"_join({choices}({chars}, k={self.cnt}))"
+
         def dump(self, level=0):
             print(StringGenerator.mytab * level + repr(self))
 
@@ -426,6 +1816,10 @@ class StringGenerator:
             else:
                 return str(src)
 
+        def render_many(self, randomizer, n, **kwargs):
+            # a source may be a callable or generator, so it is consulted per row
+            return [self.render(randomizer, **kwargs) for _ in range(n)]
+
         def count(self, randomizer, **kwargs):
             """Since a source name can be a callable, we can't say what the count
             is.
@@ -433,6 +1827,15 @@ class StringGenerator:
             """
             raise NotImplementedError("Cannot get count for source nodes")
 
+        def unranker(self, randomizer):
+            raise NotImplementedError("Cannot enumerate source nodes")
+
+        def iter_from(self, randomizer, i):
+            raise NotImplementedError("Cannot enumerate source nodes")
+
+        def emit(self, compiler):
+            return f"{compiler.bind(self.render, 'src')}({compiler.bind(compiler.randomizer, 'rnd')}, **kw)"
+
         def dump(self, level=0):
             print((StringGenerator.mytab * level) + "$%s" % self.source)
 
@@ -442,12 +1845,39 @@ class StringGenerator:
         def __str__(self):
             return str(self)
 
-    def __init__(self, pattern, uaf=10, randomizer=None, seed=None):
+    # Rows rendered per NumPy batch; bounds the size of the intermediate arrays.
+    numpy_chunk_size = 1 << 18
+
+    # Largest number of rows a worker process renders per task.
+    parallel_chunk_size = 100_000
+
+    # render_set() strategy: plain sampling up to sample_fraction of count(),
+    # then oversampled batches, unless their expected draws cost more than
+    # sampling without replacement, where each string (a Feistel round trip
+    # and an unrank) costs about permute_cost random draws.
+    sample_fraction = 0.01
+    permute_cost = 10
+
+    # Largest batch drawn between checks of a timeout= or max_attempts= budget.
+    budget_chunk_size = 10_000
+
+    def __init__(self, pattern, uaf=10, randomizer=None, seed=None, compile=False, backend=None):
+        if backend not in (None, "python", "numpy"):
+            raise ValueError(f"unknown backend: {backend!r}")
         self.pattern = pattern
+        self.backend = backend
         self.pos = 0
         self.unique_attempts_factor = uaf
-        self.tokens = self._tokenize()
-        self.seq = self._parse()
+        cached = _parse_cache.get((type(self), pattern))
+        if cached is None:
+            self.tokens = self._tokenize()
+            self.seq = self._parse()
+            _parse_cache.put((type(self), pattern), (self.tokens, self.seq))
+        else:
+            self.tokens, self.seq = cached
+        # Kept so that worker processes can rebuild an equivalent randomizer;
+        # None unless the randomizer really was seeded from it.
+        self.seed = seed if seed is not None and not randomizer else None
         if randomizer:
             if not (
                 hasattr(randomizer, "randint")
@@ -462,6 +1892,15 @@ class StringGenerator:
             self.randomizer = randomizer
         else:
             self.randomizer = randomizer_factory(seed)
+        # The randomizer built here, if any: an unseeded Random fallback from
+        # randomizer_factory() may be replaced by a fresh one in a worker, a
+        # caller's Random may not.
+        self._factory_randomizer = None if randomizer else self.randomizer
+        self._compiled = None
+        # Details of the last render_set() call; see plan_unique().
+        self.stats = {}
+        if compile:
+            self.compile()
 
     def getCharacterRange(self, f, t):
         chars = ""
@@ -713,6 +2152,22 @@ class StringGenerator:
 
         return StringGenerator.Sequence(seq)
 
+    def compile(self):
+        """Compile the template into a single specialized render function.
+
+        After this, render() (and everything built on it) calls the generated
+        function instead of walking the parse tree. Output is identical to the
+        uncompiled generator for the same randomizer state. The randomizer's
+        methods are bound now, so call compile() again if you replace
+        ``self.randomizer``.
+
+        Returns:
+            self, so it can be chained: ``SG(pattern).compile().render()``.
+
+        """
+        self._compiled = TemplateCompiler(self.randomizer).compile(self.seq)
+        return self
+
     def render(self, **kwargs) -> str:
         """Produce a randomized string that fits the template/pattern.
 
@@ -723,8 +2178,602 @@ class StringGenerator:
             The generated string.
 
         """
+        if self._compiled is not None:
+            return self._compiled(kwargs)
         return self.seq.render(self.randomizer, **kwargs)
 
+    def render_bytes(self, encoding="utf-8", **kwargs) -> bytes:
+        """Produce a randomized string as bytes, e.g. to write to a socket or file.
+
+        Literals are encoded once and kept, and character classes draw from a
+        pre-encoded alphabet, so for an ASCII template no str is built and
+        encoded per string. The randomness is drawn exactly as by render(),
+        so ``render_bytes()`` equals ``render().encode()`` for the same
+        randomizer state.
+
+        Args:
+            encoding (str): the encoding of the result
+
+        Returns:
+            The generated bytes.
+
+        """
+        if self._compiled is not None:
+            return self._compiled(kwargs).encode(encoding)
+        return self.seq.render_bytes(self.randomizer, encoding, **kwargs)
+
+    def render_many(self, cnt, encoding=None, **kwargs) -> typing.List:
+        """Return a list of cnt generated strings, rendered as one batch.
+
+        Unlike calling render() cnt times, this walks the template once and
+        each node draws randomness for the whole batch: a character class
+        makes a single choices() call for all cnt strings, and an alternation
+        picks every row's branch at once and renders each branch in bulk. The
+        strings are distributed exactly as with render(), but for the same seed
+        they differ from those of repeated render() calls.
+
+        With ``backend="numpy"`` the batch is rendered with NumPy when the
+        template allows it; see render_array().
+
+        Args:
+            cnt (int): number of strings
+            encoding (str): return bytes in this encoding instead of str; see
+                render_bytes()
+
+        Returns:
+            list.
+
+        """
+        if self.backend == "numpy":
+            numpy = import_numpy()
+            parts = self._numpy_parts()
+            if numpy is not None and parts is not None:
+                result = []
+                for start in range(0, cnt, self.numpy_chunk_size):
+                    rows = self._render_numpy(numpy, parts, min(self.numpy_chunk_size, cnt - start))
+                    if encoding is not None:
+                        rows = numpy.char.encode(rows, encoding)
+                    result.extend(rows.tolist())
+                return result
+        if encoding is not None:
+            return self.seq.render_many_bytes(self.randomizer, cnt, encoding, **kwargs)
+        return self.seq.render_many(self.randomizer, cnt, **kwargs)
+
+    def iter_render(
+        self,
+        n=None,
+        chunk_size=10_000,
+        unique=False,
+        chunks=False,
+        workers=None,
+        timeout=None,
+        max_attempts=None,
+        partial=False,
+        encoding=None,
+        **kwargs,
+    ) -> typing.Iterator:
+        """Lazily generate strings, rendering them in batches of chunk_size.
+
+        Nothing but the current batch is held in memory (plus, with
+        ``unique=True``, the set of strings already produced), so this can
+        feed a database loader or a file with tens of millions of rows.
+
+        Args:
+            n (int): number of strings, or None to generate forever
+            chunk_size (int): strings rendered per render_many() batch
+            unique (bool): never yield the same string twice
+            chunks (bool): yield lists of strings instead of single strings
+            workers (int): render batches in this many processes, keeping a
+                few batches per worker in flight; see render_parallel()
+            timeout (float): stop after this many seconds, including the time
+                spent by the consumer between batches
+            max_attempts (int): stop after rendering this many strings
+            partial (bool): when the timeout or max_attempts budget is spent,
+                just end the iteration instead of raising UniquenessError
+            encoding (str): yield bytes in this encoding instead of str; see
+                render_bytes()
+
+        Returns:
+            iterator of str, or of lists of str if ``chunks`` is true.
+
+        With ``unique=True`` a template that cannot produce enough distinct
+        strings raises UniquenessError: after ``n * uaf`` attempts when n is
+        given, or after ``uaf`` consecutive batches without a new string when
+        it is not. The budget is checked before each batch. The strings
+        produced so far have already been yielded, so the error's
+        ``partial`` is None.
+
+        """
+        budget = _Budget(timeout, max_attempts)
+        pool = self._pool_batches(chunk_size, workers, kwargs) if workers and workers > 1 else None
+        seen: typing.Set = set()
+        produced = 0
+        attempts = 0
+        barren = 0
+        try:
+            while n is None or produced < n:
+                if unique and n is not None and attempts > n * self.unique_attempts_factor:
+                    raise StringGenerator.UniquenessError("couldn't satisfy uniqueness")
+                if budget.spent(attempts):
+                    if partial:
+                        return
+                    raise StringGenerator.UniquenessError("generation budget spent")
+                size = chunk_size if n is None else min(chunk_size, n - produced)
+                size = budget.size(size, attempts)
+                if pool is None:
+                    batch = self.render_many(size, encoding=encoding, **kwargs)
+                else:
+                    batch = next(pool)[:size]
+                    if encoding is not None:
+                        batch = [s.encode(encoding) for s in batch]
+                attempts += size
+                if unique:
+                    batch = [s for s in dict.fromkeys(batch) if s not in seen]
+                    seen.update(batch)
+                    barren = 0 if batch else barren + 1
+                    if n is None and barren > self.unique_attempts_factor:
+                        raise StringGenerator.UniquenessError("couldn't satisfy uniqueness")
+                produced += len(batch)
+                if not batch:
+                    continue
+                if chunks:
+                    yield batch
+                else:
+                    yield from batch
+        finally:
+            if pool is not None:
+                pool.close()
+
+    def render_unique_stream(
+        self,
+        n,
+        dedupe="bloom",
+        fp_rate=1e-9,
+        chunk_size=10_000,
+        chunks=False,
+        timeout=None,
+        max_attempts=None,
+        partial=False,
+        **kwargs,
+    ) -> typing.Iterator:
+        """Lazily generate n distinct strings, remembering them compactly.
+
+        Like ``iter_render(n, unique=True)``, but the strings already produced
+        can be tracked in a BloomFilter instead of a set, so memory depends on
+        n and fp_rate rather than on the length of the strings. With the
+        default rate, 500 million strings need about 2.7 GB.
+
+        Args:
+            n (int): number of strings
+            dedupe (str): ``"bloom"`` for a BloomFilter, or ``"set"`` for an
+                exact set
+            fp_rate (float): the filter's false-positive rate. A false
+                positive only discards a fresh string and draws again, so the
+                output never holds a duplicate.
+            chunk_size (int): strings rendered per render_many() batch
+            chunks (bool): yield lists of strings instead of single strings
+            timeout, max_attempts, partial: a budget, as for iter_render()
+
+        Returns:
+            iterator of str, or of lists of str if ``chunks`` is true.
+
+        As in render_set(), plan_unique() chooses the strategy: when n is
+        most of count(), strings are drawn without replacement by
+        render_unique() and the filter only guards against count()
+        overstating the distinct strings.
+
+        ``self.stats`` is updated as the stream is consumed: ``strategy``, ``dedupe``,
+        ``memory`` (bytes used to track seen strings), ``draws`` and
+        ``rejected`` (draws not output, mostly as seen; with a filter this includes its
+        false positives). UniquenessError is raised at once if n exceeds
+        count(), and after ``uaf`` consecutive batches without a new string.
+
+        """
+        if dedupe not in ("bloom", "set"):
+            raise ValueError(f"unknown dedupe method: {dedupe!r}")
+        strategy, space, _ = self.plan_unique(n, **kwargs)
+        if strategy == "permute":
+            # most of the space is wanted: draw without replacement, see render_unique()
+            key = self._random_key()
+        if dedupe == "bloom":
+            seen = BloomFilter(n, fp_rate)
+            fresh = seen.add_many
+        else:
+            seen = set()
+
+            def fresh(batch):
+                batch = [s for s in dict.fromkeys(batch) if s not in seen]
+                seen.update(batch)
+                return batch
+
+        stats = self.stats = {"strategy": strategy, "dedupe": dedupe, "memory": 0, "draws": 0, "rejected": 0}
+        produced = 0
+        permuted = 0
+        barren = 0
+        kept_bytes = 0  # the strings a set keeps alive, on top of its table
+        budget = _Budget(timeout, max_attempts)
+        while produced < n:
+            if budget.spent(stats["draws"]):
+                if partial:
+                    return
+                raise StringGenerator.UniquenessError("generation budget spent")
+            need = n - produced
+            if strategy == "permute" and permuted < n:
+                drawn = self.render_unique(
+                    budget.size(min(chunk_size, n - permuted), stats["draws"]), key=key, start=permuted
+                )
+                permuted += len(drawn)
+            else:
+                size = min(chunk_size, self._oversample_size(need, produced, space))
+                drawn = self.render_many(budget.size(size, stats["draws"]), **kwargs)
+            batch = fresh(drawn)[:need]
+            stats["draws"] += len(drawn)
+            stats["rejected"] += len(drawn) - len(batch)
+            if dedupe == "bloom":
+                stats["memory"] = seen.nbytes
+            else:
+                kept_bytes += sum(map(sys.getsizeof, batch))
+                stats["memory"] = sys.getsizeof(seen) + kept_bytes
+            produced += len(batch)
+            barren = 0 if batch else barren + 1
+            if barren > self.unique_attempts_factor:
+                raise StringGenerator.UniquenessError("couldn't satisfy uniqueness")
+            if not batch:
+                continue
+            if chunks:
+                yield batch
+            else:
+                yield from batch
+
+    def render_to_file(
+        self,
+        path_or_fileobj,
+        cnt,
+        sep="\n",
+        unique=False,
+        chunk_size=65_536,
+        compress=None,
+        encoding="utf-8",
+        workers=None,
+        **kwargs,
+    ) -> int:
+        """Write cnt generated strings to a file, each followed by sep.
+
+        Strings are rendered in batches (see iter_render()) and every batch is
+        joined and encoded once and handed to a single write() call, so no
+        list of all results is built and there is no per-string write.
+
+        Args:
+            path_or_fileobj: a path, or a file object open for writing such as
+                an open file, ``sys.stdout.buffer`` or ``socket.makefile("wb")``;
+                binary file objects receive encoded bytes, text ones str
+            cnt (int): number of strings
+            sep (str): written after every string
+            unique (bool): never write the same string twice
+            chunk_size (int): strings rendered and written per batch
+            compress (str): "gzip" to compress the output as it is written;
+                a file object must then be binary
+            encoding (str): encoding for binary output
+            workers (int): render in this many processes; see iter_render()
+
+        Returns:
+            int: number of bytes written before compression (characters for a
+            text file object).
+
+        A path is opened, and closed again, by this method. A file object is
+        left open; with ``compress="gzip"`` the gzip stream written to it is
+        finished, but the file object itself is not closed.
+
+        """
+        # binary output is rendered as bytes, with no str joined and encoded
+        binary = not isinstance(path_or_fileobj, io.TextIOBase)
+        batches = self.iter_render(
+            cnt,
+            chunk_size=chunk_size,
+            unique=unique,
+            chunks=True,
+            workers=workers,
+            encoding=encoding if binary else None,
+            **kwargs,
+        )
+        return self._write_output(path_or_fileobj, batches, sep, compress, encoding)
+
+    @staticmethod
+    def _check_output(path_or_fileobj, compress):
+        """Raise ValueError for output options that render_to_file() cannot write."""
+        if compress not in (None, "gzip"):
+            raise ValueError(f"unknown compression: {compress!r}")
+        if compress and isinstance(path_or_fileobj, io.TextIOBase):
+            raise ValueError("compressed output needs a binary file object, not a text one")
+
+    @staticmethod
+    def _write_output(path_or_fileobj, batches, sep, compress, encoding):
+        """Open the output as render_to_file() describes and write the batches to it."""
+        StringGenerator._check_output(path_or_fileobj, compress)
+        if isinstance(path_or_fileobj, (str, bytes, os.PathLike)):
+            opener = gzip.open if compress else open
+            with opener(path_or_fileobj, "wb") as f:
+                return StringGenerator._write_batches(f, batches, sep, encoding)
+        if compress:
+            with gzip.GzipFile(fileobj=path_or_fileobj, mode="wb") as f:
+                return StringGenerator._write_batches(f, batches, sep, encoding)
+        return StringGenerator._write_batches(path_or_fileobj, batches, sep, encoding)
+
+    @staticmethod
+    def _write_batches(f, batches, sep, encoding):
+        text = isinstance(f, io.TextIOBase)
+        trailer = sep if text else sep.encode(encoding)
+        write = f.write
+        written = 0
+        for batch in batches:
+            if not batch:
+                continue
+            if isinstance(batch[0], bytes):
+                data = trailer.join(batch)
+            else:
+                data = sep.join(batch)
+                if not text:
+                    data = data.encode(encoding)
+            write(data)
+            write(trailer)
+            written += len(data) + len(trailer)
+        return written
+
+    def render_set_to_file(
+        self,
+        path_or_fileobj,
+        cnt,
+        max_memory=256 << 20,
+        order="sorted",
+        sep="\n",
+        chunk_size=65_536,
+        compress=None,
+        encoding="utf-8",
+        tmpdir=None,
+        **kwargs,
+    ) -> int:
+        """Write cnt distinct strings to a file, using temporary files rather than RAM.
+
+        This gives the guarantee of render_set() (exactly cnt distinct strings,
+        and UniquenessError straight away if count() is too small) for outputs
+        larger than memory, without the false positives of
+        render_unique_stream(). Strings are rendered in batches until about
+        ``max_memory`` bytes are held, then sorted and spilled to a run file
+        in ``tmpdir``. The runs are merged (a k-way merge with heapq.merge)
+        into one sorted file, dropping duplicates. If fewer than cnt distinct
+        strings are left, fresh strings are drawn and merged in. Finally cnt
+        of them are chosen uniformly at random in a single pass and written
+        out.
+
+        Args:
+            path_or_fileobj: the output, as for render_to_file()
+            cnt (int): number of strings
+            max_memory (int): approximate bound, in bytes, on the strings held
+                in memory at any time
+            order (str): ``"sorted"`` writes the strings in sorted order;
+                ``"shuffled"`` in random order, by scattering them at random
+                into temporary files that each fit in memory and shuffling
+                each one
+            sep (str): written after every string
+            chunk_size (int): strings rendered and written per batch
+            compress (str): "gzip" to compress the output as it is written;
+                a file object must then be binary
+            encoding (str): encoding for binary output
+            tmpdir (str): directory for the temporary files; by default the
+                system's temporary directory. It needs room for about twice
+                the output.
+
+        Returns:
+            int: number of bytes written before compression.
+
+        The strategy is chosen by plan_unique(), and ``self.stats`` records it
+        with the number of strings drawn, run files written and merge rounds.
+
+        """
+        if order not in ("sorted", "shuffled"):
+            raise ValueError(f"unknown order: {order!r}")
+        self._check_output(path_or_fileobj, compress)
+        strategy, space, expected = self.plan_unique(cnt, **kwargs)
+        stats = self.stats = {
+            "strategy": strategy,
+            "space": space,
+            "expected_duplicates": expected,
+            "draws": 0,
+            "runs": 0,
+            "rounds": 0,
+        }
+        if strategy == "permute":
+            key = self._random_key()
+        with tempfile.TemporaryDirectory(prefix="strgen-", dir=tmpdir) as tmp:
+            merged = None
+            unique = 0
+            permuted = 0
+            barren = 0
+            per_string = 128  # bytes held per string, measured on each batch
+            while unique < cnt or merged is None:
+                permuting = strategy == "permute" and permuted < cnt
+                if permuting:
+                    target = cnt - permuted
+                elif strategy == "sample":
+                    # a merge round rereads everything, so draw enough to
+                    # cover the expected duplicates in one
+                    need = cnt - unique
+                    target = need + 16 + math.ceil(2 * (expected_duplicates(need, space) if space else need * 0.01))
+                else:
+                    target = self._oversample_size(cnt - unique, unique, space)
+                runs = []
+                buffer: typing.List = []
+                held = 0
+                drawn = 0
+                while drawn < target or not runs:
+                    size = min(chunk_size, target - drawn, max(1, int(max_memory / per_string)))
+                    if permuting:
+                        batch = self.render_unique(size, key=key, start=permuted)
+                        permuted += size
+                    else:
+                        batch = self.render_many(size, **kwargs)
+                    drawn += size
+                    buffer.extend(batch)
+                    # the strings, their list slots and the set and list made to sort them
+                    batch_bytes = sum(map(sys.getsizeof, batch)) + 64 * size
+                    per_string = batch_bytes / max(size, 1)
+                    held += batch_bytes
+                    if held >= max_memory or drawn >= target:
+                        fd, run = tempfile.mkstemp(dir=tmp, suffix=".run")
+                        os.close(fd)
+                        _write_run(run, sorted(set(buffer)))
+                        runs.append(run)
+                        buffer = []
+                        held = 0
+                stats["draws"] += drawn
+                stats["runs"] += len(runs)
+                stats["rounds"] += 1
+                before = unique
+                merged, unique = _merge_runs(([merged] if merged else []) + runs, tmp)
+                barren = 0 if unique > before else barren + 1
+                if barren > self.unique_attempts_factor:
+                    raise StringGenerator.UniquenessError("couldn't satisfy uniqueness")
+
+            strings = _read_run(merged)
+            if unique > cnt:
+                strings = _select(strings, unique, cnt, self.randomizer.random)
+            if order == "sorted":
+                batches = _batched(strings, chunk_size)
+            else:
+                # estimated bytes per string in memory: its encoded length plus object overhead
+                per_string = os.path.getsize(merged) / max(unique, 1) + 120
+                batches = self._shuffled_batches(strings, cnt, per_string, max_memory, chunk_size, tmp)
+            return self._write_output(path_or_fileobj, batches, sep, compress, encoding)
+
+    def _shuffled_batches(self, strings, cnt, per_string, max_memory, chunk_size, directory):
+        """Yield strings in uniformly random order using bucket files that each fit in max_memory.
+
+        Every string goes to a bucket chosen at random, and each bucket is then
+        loaded and shuffled in turn (the Rao-Sandelius method), which gives a
+        uniformly random permutation of the whole stream.
+        """
+        shuffle = self.randomizer.shuffle
+        buckets = max(1, math.ceil(cnt * per_string / max_memory))
+        if buckets == 1:
+            strings = list(strings)
+            shuffle(strings)
+            yield from _batched(strings, chunk_size)
+            return
+        paths = [os.path.join(directory, f"bucket{i}") for i in range(buckets)]
+        pending: typing.List[typing.List] = [[] for _ in paths]
+        randrange = self.randomizer.randrange
+        flush_at = max(chunk_size, int(max_memory / 2 / per_string))
+        held = 0
+
+        def flush():
+            for path, bucket in zip(paths, pending):
+                if bucket:
+                    _write_run(path, bucket, mode="a")
+                    bucket.clear()
+
+        for s in strings:
+            pending[randrange(buckets)].append(s)
+            held += 1
+            if held >= flush_at:
+                flush()
+                held = 0
+        flush()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            bucket = list(_read_run(path))
+            os.remove(path)
+            shuffle(bucket)
+            yield from _batched(bucket, chunk_size)
+
+    def _numpy_parts(self):
+        """Return the template as a flat list of Literal and CharacterSet nodes,
+        or None if the NumPy backend cannot render it.
+
+        Only plain sequences of literals and character classes qualify:
+        alternation, '&' and ${source} need per-row Python logic. NUL
+        characters are excluded because NumPy strips them from string ends.
+        """
+        parts = []
+
+        def flatten(node):
+            if type(node) is StringGenerator.Sequence:
+                return all(flatten(x) for x in node.seq)
+            if isinstance(node, StringGenerator.Literal):
+                text = node.literal
+            elif isinstance(node, StringGenerator.CharacterSet):
+                text = node.chars
+            else:
+                return False
+            parts.append(node)
+            return "\0" not in text
+
+        return parts if flatten(self.seq) else None
+
+    def _render_numpy(self, numpy, parts, cnt):
+        """Render cnt rows of a flat template into a NumPy unicode array.
+
+        Each character class becomes an (cnt, width) array of alphabet indices
+        from ``numpy.random.Generator.integers`` mapped through a code point
+        lookup table. The columns are concatenated and the uint32 code points
+        reinterpreted as fixed-width strings, so no Python string is built per
+        character. The Generator is seeded from self.randomizer, which keeps
+        seeded generators reproducible.
+        """
+        rng = numpy.random.default_rng(self.randomizer.getrandbits(128))
+        columns = []
+        ranged = False
+        for node in parts:
+            if isinstance(node, StringGenerator.Literal):
+                codes = numpy.array([ord(c) for c in node.literal], dtype=numpy.uint32)
+                columns.append(numpy.broadcast_to(codes, (cnt, len(codes))))
+                continue
+            table = numpy.array([ord(c) for c in node.chars], dtype=numpy.uint32)
+            index_type = numpy.uint8 if len(table) <= 256 else numpy.uint32
+            column = table[rng.integers(0, len(table), size=(cnt, node.cnt), dtype=index_type)]
+            if node.start > -1:
+                lengths = rng.integers(node.start, node.cnt, size=cnt, endpoint=True)
+                column[numpy.arange(node.cnt) >= lengths[:, None]] = 0
+                ranged = True
+            columns.append(column)
+        width = sum(column.shape[1] for column in columns)
+        if width == 0:
+            return numpy.zeros(cnt, dtype="U1")
+        codes = numpy.concatenate(columns, axis=1)
+        if ranged:
+            # a range quantifier pads short rows with 0 in the middle of the row;
+            # a stable sort on "is padding" moves the padding to the end, where
+            # the fixed-width string dtype ignores it
+            codes = numpy.take_along_axis(codes, numpy.argsort(codes == 0, axis=1, kind="stable"), axis=1)
+        return numpy.ascontiguousarray(codes, dtype=numpy.uint32).view(numpy.dtype((numpy.str_, width))).reshape(cnt)
+
+    def render_array(self, cnt):
+        """Return cnt generated strings as a NumPy fixed-width unicode array.
+
+        This is the raw output of the NumPy backend, for callers who can work
+        with the array directly and skip building Python strings altogether.
+        It needs numpy and a template made only of literals and character
+        classes (no alternation, '&' or ${source}).
+
+        Note that NumPy's generators are not cryptographically secure, even
+        though they are seeded from this generator's randomizer. Do not use
+        the NumPy backend for passwords, tokens or keys.
+
+        Args:
+            cnt (int): number of strings
+
+        Returns:
+            numpy.ndarray of shape (cnt,).
+
+        """
+        numpy = import_numpy()
+        if numpy is None:
+            raise ImportError("render_array() requires numpy")
+        parts = self._numpy_parts()
+        if parts is None:
+            raise ValueError("the NumPy backend supports only literals and character classes")
+        return self._render_numpy(numpy, parts, cnt)
+
     def count(self, **kwargs) -> int:
         r"""Return the size of the generation sample space for the template.
 
@@ -752,6 +2801,119 @@ class StringGenerator:
         """
         return self.seq.count(self.randomizer, **kwargs)
 
+    def unrank(self, i) -> str:
+        """Return the string with index i in the template's sample space.
+
+        Every integer in ``range(count())`` maps to its own rendering, in a
+        stable order: alternation branches in template order, shorter lengths
+        of a range quantifier first, and otherwise like counting, with the
+        last character varying fastest. The mapping is one-to-one on strings
+        only under the assumptions described in count(); it raises
+        NotImplementedError where count() does.
+
+        Args:
+            i (int): index, ``0 <= i < count()``
+
+        Returns:
+            The string at that index.
+
+        """
+        if not 0 <= i < self.count():
+            raise IndexError(f"{i} is outside the sample space of {self.pattern!r}")
+        return self.seq.unranker(self.randomizer)(i)
+
+    def iter_all(self, start=0, stop=None) -> typing.Iterator[str]:
+        """Lazily yield every string the template can produce, in unrank() order.
+
+        Strings are produced by a mixed-radix counter over the template's
+        nodes rather than by building products, so memory use is constant.
+        ``start`` and ``stop`` select indexes ``start <= i < stop``, as in a
+        slice, so an enumeration can be resumed or split into shards. As in a
+        slice, negative values count back from count() and out of range
+        values are clipped.
+
+        Args:
+            start (int): index of the first string
+            stop (int): index after the last string; defaults to count()
+
+        Returns:
+            iterator of str.
+
+        Like unrank(), this raises NotImplementedError for templates that
+        count() cannot size.
+
+        """
+        space = self.count()
+        start = max(0, start + space) if start < 0 else start
+        if stop is None:
+            stop = space
+        else:
+            stop = max(0, stop + space) if stop < 0 else min(stop, space)
+        if start >= stop:
+            return iter(())
+        values = self.seq.iter_from(self.randomizer, start)
+        if stop == space:
+            return values
+        # zip with a range rather than islice(), which is limited to sys.maxsize
+        return (value for _, value in zip(range(stop - start), values))
+
+    def render_unique(self, cnt, key=None, start=0, exclude=None, **kwargs) -> typing.List:
+        """Return cnt distinct strings without retries or a dedupe set.
+
+        The indexes ``start`` to ``start + cnt - 1`` are passed through a keyed
+        pseudorandom permutation of ``range(count())`` (a FeistelPermutation)
+        and then through unrank(). Since a permutation never maps two indexes
+        to the same value, the strings are distinct by construction, in O(cnt)
+        time and O(1) extra memory, even when cnt equals count().
+
+        Args:
+            cnt (int): number of strings
+            key (bytes, str or int): permutation key. By default a random 256
+                bit key is drawn from the randomizer, so a seeded generator is
+                reproducible. Calls with the same key and non-overlapping
+                ``start`` ranges never produce the same string, which makes
+                it easy to issue disjoint batches.
+            start (int): first index to permute
+            exclude: strings to skip, such as those issued before; any
+                container that supports ``in``, e.g. a set or an
+                ExclusionStore. Indexes from ``start`` on are used until cnt
+                strings outside it are found, and UniquenessError is raised
+                if the space runs out first.
+
+        Returns:
+            list.
+
+        The strings are distinct only under the assumptions described in
+        count() (no repeated characters in a class, disjoint alternation
+        branches). Templates that count() cannot size raise
+        NotImplementedError. Anyone who knows the key can reproduce the
+        strings, so keep it as secret as the strings themselves.
+
+        """
+        space = self.count()
+        if start < 0 or start + cnt > space:
+            raise StringGenerator.UniquenessError(f"the template can only produce {space} distinct strings")
+        if key is None:
+            key = self._random_key()
+        elif isinstance(key, int):
+            key = str(key).encode("ascii")
+        elif isinstance(key, str):
+            key = key.encode("utf-8")
+        permute = FeistelPermutation(space, key)
+        unrank = self.seq.unranker(self.randomizer)
+        if exclude is None:
+            return [unrank(permute(i)) for i in range(start, start + cnt)]
+        result = []
+        i = start
+        while len(result) < cnt:
+            if i >= space:
+                raise StringGenerator.UniquenessError(f"the template cannot produce {cnt} strings outside exclude")
+            s = unrank(permute(i))
+            if s not in exclude:
+                result.append(s)
+            i += 1
+        return result
+
     def dump(self, cnt=None, **kwargs):
         """Print the parse tree and then call render for an example."""
         import sys
@@ -768,13 +2930,31 @@ class StringGenerator:
             return self.render_list(cnt, **kwargs)
         return self.render(**kwargs)
 
-    def render_list(self, cnt, unique=False, progress_callback=None, **kwargs) -> typing.List:
+    def render_list(
+        self,
+        cnt,
+        unique=False,
+        progress_callback=None,
+        workers=None,
+        timeout=None,
+        max_attempts=None,
+        partial=False,
+        encoding=None,
+        **kwargs,
+    ) -> typing.List:
         """Return a list of generated strings.
 
         Args:
             cnt (int): length of list
             unique (bool): whether to make entries unique
             progress_callback: callable
+            workers (int): render in this many processes; see render_parallel()
+            timeout (float): give up after this many seconds
+            max_attempts (int): give up after rendering this many strings
+            partial (bool): when the timeout or max_attempts budget is spent,
+                return the shorter list instead of raising UniquenessError
+            encoding (str): return bytes in this encoding instead of str; see
+                render_bytes()
 
         Returns:
             list.
@@ -782,37 +2962,157 @@ class StringGenerator:
         We keep track of total attempts because a template may
         specify something impossible to attain, like [1-9]{} with cnt==1000
 
+        The budget is checked every ``budget_chunk_size`` attempts, so the
+        timeout may be overrun by the time those take. UniquenessError, when
+        raised, holds the list so far in ``partial``.
+
+        With ``backend="numpy"``, a non-unique list without a progress callback
+        is rendered in batches by render_many().
+
         """
+        budget = _Budget(timeout, max_attempts)
 
-        rendered_list = []
+        if workers and workers > 1:
+            result = self._render_list_parallel(cnt, unique, progress_callback, workers, budget, partial, kwargs)
+            return result if encoding is None else [s.encode(encoding) for s in result]
+
+        if self.backend == "numpy" and not unique and progress_callback is None and not budget.limited:
+            return self.render_many(cnt, encoding=encoding, **kwargs)
+
+        render = self.render if encoding is None else functools.partial(self.render_bytes, encoding)
+
+        # A dict keeps insertion order and checks membership in O(1), so a
+        # unique list costs the same per item however long it grows.
+        rendered = {} if unique else []
         i = 0
         total_attempts = 0
-        while True:
-            if i >= cnt:
-                break
-            if total_attempts > cnt * self.unique_attempts_factor:
-                raise StringGenerator.UniquenessError("couldn't satisfy uniqueness")
-            s = self.render(**kwargs)
-            if unique:
-                if s not in rendered_list:
-                    rendered_list.append(s)
+        while i < cnt:
+            if budget.spent(total_attempts):
+                if partial:
+                    break
+                raise StringGenerator.UniquenessError(
+                    "generation budget spent", partial=list(rendered) if unique else rendered
+                )
+            for _ in range(budget.size(self.budget_chunk_size, total_attempts)):
+                if i >= cnt:
+                    break
+                if total_attempts > cnt * self.unique_attempts_factor:
+                    raise StringGenerator.UniquenessError(
+                        "couldn't satisfy uniqueness", partial=list(rendered) if unique else rendered
+                    )
+                s = render(**kwargs)
+                if unique:
+                    if s not in rendered:
+                        rendered[s] = None
+                        i += 1
+                else:
+                    rendered.append(s)
                     i += 1
-            else:
-                rendered_list.append(s)
-                i += 1
-            total_attempts += 1
+                total_attempts += 1
+
+                # Optionally trigger the progress indicator to inform others about our progress
+                if progress_callback and callable(progress_callback):
+                    progress_callback(i, cnt)
+
+        return list(rendered) if unique else rendered
 
-            # Optionally trigger the progress indicator to inform others about our progress
-            if progress_callback and callable(progress_callback):
-                progress_callback(i, cnt)
+    def plan_unique(self, cnt, **kwargs) -> typing.Tuple[str, typing.Optional[int], typing.Optional[float]]:
+        """Choose how render_set() should collect cnt distinct strings.
+
+        Args:
+            cnt (int): number of distinct strings wanted
+
+        Returns:
+            tuple of (strategy, space, expected duplicates).
+
+        The space is count(). If cnt exceeds it the request can never be met
+        and UniquenessError is raised at once. Otherwise the expected number
+        of duplicates among cnt draws (the birthday bound) decides the
+        strategy:
+
+        * ``"sample"``: cnt is at most ``sample_fraction`` of the space, so
+          collisions are rare; draw what is missing until the set is full.
+        * ``"oversample"``: collisions are moderate; draw enough extra in each
+          batch to expect the set to fill in one pass.
+        * ``"permute"``: the set is so close to the whole space that the
+          expected draws of oversampling cost more than sampling without
+          replacement with render_unique(), at ``permute_cost`` draws per
+          string. In practice that is only within a few thousandths of a
+          percent of the whole space.
+
+        Templates that count() cannot size (``${...}`` sources, ``&`` over
+        varying operands) always use ``"sample"``, with a space and estimate
+        of None.
+        """
+        return self._plan_unique(cnt, 0, kwargs)
 
-        return rendered_list
+    def _plan_unique(self, cnt, excluded, kwargs):
+        """plan_unique() for a request that must also avoid excluded strings.
 
-    def render_set(self, cnt, **kwargs) -> typing.Set:
+        The excluded strings are assumed to come from the same template, so
+        they count towards how full the space is. They may not, so they do
+        not make the request fail early.
+        """
+        try:
+            space = self.count(**kwargs)
+        except NotImplementedError:
+            return "sample", None, None
+        if cnt > space:
+            raise StringGenerator.UniquenessError(f"the template can only produce {space} distinct strings")
+        expected = expected_duplicates(cnt, space)
+        # exact fractions: count() may be far beyond the range of a float
+        if cnt + excluded <= space * Fraction(self.sample_fraction):
+            return "sample", space, expected
+        # Collecting cnt of the free strings takes about
+        # space * -log(1 - cnt / free) draws; walking the permutation past the
+        # excluded ones takes cnt * space / free unranks.
+        free = space - excluded
+        if cnt >= free or -math.log1p(-cnt / free) > self.permute_cost * cnt / free:
+            return "permute", space, expected
+        return "oversample", space, expected
+
+    def _random_key(self) -> bytes:
+        """Draw a 32-byte permutation key with choices(), part of the randomizer contract."""
+        return bytes(self.randomizer.choices(range(256), k=32))
+
+    @staticmethod
+    def _oversample_size(need, have, space) -> int:
+        """Return how many draws are expected to add need new values to have of space."""
+        if space is None or space <= 1 or need >= space - have:
+            return need
+        if space > 1 << 53:
+            # 1 / space underflows; repeats are negligible anyway
+            return need
+        draws = math.log1p(-need / (space - have)) / math.log1p(-1 / space)
+        # near a full space the last few strings take many draws each; allow
+        # batches big enough to find some rather than trip the barren guard
+        return min(max(need, math.ceil(draws * 1.05)), max(4 * need + 64, 1 << 16))
+
+    def render_set(
+        self,
+        cnt,
+        workers=None,
+        exclude=None,
+        existing=None,
+        timeout=None,
+        max_attempts=None,
+        partial=False,
+        **kwargs,
+    ) -> typing.Set:
         """Return a set of generated strings that will as a result be unique.
 
         Args:
             cnt (int): length of list
+            workers (int): render in this many processes; see render_parallel()
+            exclude: strings that must not be returned, such as those issued
+                before; any container that supports ``in``, e.g. a set or an
+                ExclusionStore
+            existing (set): add cnt new strings to this set in place and
+                return it, instead of starting from an empty set; see extend()
+            timeout (float): give up after this many seconds
+            max_attempts (int): give up after rendering this many strings
+            partial (bool): when the timeout or max_attempts budget is spent,
+                return the smaller set instead of raising UniquenessError
 
         Returns:
             set
@@ -820,22 +3120,303 @@ class StringGenerator:
         This is like `render_list(n, unique=True)` but will not take a callback and returns a set.
         It will be much faster than `render_list()`.
 
-        Caution: this will not check if the solution set is
-        feasible. It will be stuck in a loop if you use a large sample space . The following
-        will never complete:
+        The strategy is chosen by plan_unique(), which raises UniquenessError
+        straight away if cnt exceeds count(), so ``SG("[123]{2}").render_set(100)``
+        fails instead of looping. The plan and the number of strings drawn are
+        recorded in ``self.stats``. If count() overstates the number of distinct
+        strings (see its caveats) and the set stops growing, UniquenessError is
+        raised after ``uaf`` batches in a row add nothing.
 
-            SG("[123]{2}").render_set(100)
+        With a budget, strings are drawn in batches of at most
+        ``budget_chunk_size`` and the budget is checked between them, so a
+        timeout is overrun by at most one batch. The permutation used for the
+        ``"permute"`` strategy runs to completion. UniquenessError, when
+        raised, holds the set so far in ``partial``.
 
         """
+        results: typing.Set = set() if existing is None else existing
+        self._fill(results, cnt, workers, exclude, kwargs, _Budget(timeout, max_attempts), partial, collect=False)
+        return results
 
-        results: typing.Set = set()
-        while len(results) < cnt:
-            results |= {self.render(**kwargs) for _ in range(cnt - len(results))}
+    def extend(
+        self, existing, k, workers=None, exclude=None, timeout=None, max_attempts=None, partial=False, **kwargs
+    ) -> typing.List:
+        """Add exactly k new distinct strings to existing, in place, and return them.
 
-        return results
+        Args:
+            existing: the strings to add to, which is not copied. A set, or
+                one of the compact stores (ExclusionStore, BloomFilter), or
+                anything else with ``in``, ``len()`` and ``update()``.
+            k (int): number of new strings
+            workers (int): render in this many processes; see render_parallel()
+            exclude: further strings that must not be returned, as for
+                render_set()
+            timeout, max_attempts, partial: a budget, as for render_set();
+                ``partial`` of a UniquenessError is the list of new strings
+
+        Returns:
+            list of the k new strings, in the order they were added.
+
+        This tops up a pool without rebuilding it::
+
+            tokens = sg.render_set(10000000)
+            sg.extend(tokens, 50000)
+
+        It works as render_set() does and records ``self.stats`` the same way.
+        The strings already in existing are assumed to come from this
+        template when the strategy is chosen. A store keeps only digests, so
+        the returned list is the only copy of the new strings.
+
+        """
+        return self._fill(existing, k, workers, exclude, kwargs, _Budget(timeout, max_attempts), partial)
+
+    def _fill(self, results, cnt, workers, exclude, kwargs, budget, partial, collect=True):
+        """Add cnt strings that are not in results or exclude to results; return them if collect.
+
+        With partial, stop quietly when the budget is spent.
+        """
+        start = len(results)
+        # a container without len() only affects which strings are kept
+        excluded = start + (len(exclude) if isinstance(exclude, collections.abc.Sized) else 0)
+        strategy, space, expected = self._plan_unique(cnt, excluded, kwargs)
+        self.stats = {"strategy": strategy, "space": space, "expected_duplicates": expected, "draws": 0}
+        added: typing.List = []
+        if start and exclude is not None:
+            avoid = _Union(results, exclude)
+        else:
+            avoid = results if start else exclude
+
+        if strategy == "permute":
+            # Walk a keyed permutation of the space in chunks, as
+            # render_unique() does, so the budget is checked between chunks.
+            # Nothing is added to results if the space runs out.
+            permute = FeistelPermutation(space, self._random_key())
+            unrank = self.seq.unranker(self.randomizer)
+            found: typing.List = []
+            while len(found) < cnt:
+                if budget.spent(self.stats["draws"]):
+                    break
+                index = self.stats["draws"]
+                if index >= space:
+                    raise StringGenerator.UniquenessError(f"the template cannot produce {cnt} strings outside exclude")
+                size = cnt - len(found)
+                if budget.limited:
+                    size = budget.size(min(size, self.budget_chunk_size), index)
+                stop = min(index + size, space)
+                fresh = [unrank(permute(i)) for i in range(index, stop)]
+                if avoid is not None:
+                    fresh = [s for s in fresh if s not in avoid]
+                found.extend(fresh)
+                self.stats["draws"] = stop
+            # count() may overstate the distinct strings; the loop below
+            # tops up, or handles a spent budget
+            found = [s for s in dict.fromkeys(found) if s not in results]
+            results.update(found)
+            if collect:
+                added.extend(found)
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+        try:
+            index = 0
+            barren = 0
+            while len(results) - start < cnt:
+                if budget.spent(self.stats["draws"]):
+                    if partial:
+                        break
+                    raise StringGenerator.UniquenessError(
+                        "generation budget spent", partial=added if collect else results
+                    )
+                need = cnt - (len(results) - start)
+                if strategy == "sample":
+                    size = need
+                else:
+                    size = self._oversample_size(need, len(results) - start + excluded, space)
+                if budget.limited:
+                    size = budget.size(min(size, self.budget_chunk_size), self.stats["draws"])
+                if executor is None:
+                    batches = [self.render_many(size, **kwargs)]
+                else:
+                    sizes = self._chunk_sizes(size)
+                    batches = self.render_parallel(executor, sizes, index, **kwargs)
+                    index += len(sizes)
+                before = len(results)
+                for batch in batches:
+                    self.stats["draws"] += len(batch)
+                    if exclude is not None:
+                        batch = [s for s in batch if s not in exclude]
+                    if size == need and not start and not collect:
+                        results.update(batch)
+                    else:
+                        # Keep the first new strings in draw order, so that a
+                        # seeded generator gives the same set every time.
+                        fresh = [s for s in dict.fromkeys(batch) if s not in results]
+                        fresh = fresh[: cnt - (len(results) - start)]
+                        results.update(fresh)
+                        if collect:
+                            added.extend(fresh)
+                barren = 0 if len(results) > before else barren + 1
+                if barren > self.unique_attempts_factor:
+                    raise StringGenerator.UniquenessError(
+                        "couldn't satisfy uniqueness", partial=added if collect else results
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return added
+
+    def _worker_randomizer(self):
+        """Describe how a worker process should rebuild this generator's randomizer.
+
+        A randomizer is never sent to a worker as-is: a copied SystemRandom is
+        harmless, but a copied seeded Random or BufferedSecureRandom would make
+        every worker produce the same values. Workers get a sub-seed derived
+        from the master seed, or a fresh entropy-based randomizer of their own.
+        """
+        randomizer = self.randomizer
+        if self.seed is not None:
+            return ("seed", None, self.seed)
+        if isinstance(randomizer, BufferedSecureRandom):
+            return ("buffered", type(randomizer), randomizer._bufsize)
+        if type(randomizer) is FastSeededRandom:
+            return ("fast", None, randomizer._seed)
+        if type(randomizer) is random.SystemRandom or (
+            type(randomizer) is random.Random and randomizer is self._factory_randomizer
+        ):
+            return ("default", None, None)
+        raise ValueError(
+            "rendering in worker processes needs a seed, the default randomizer, BufferedSecureRandom "
+            "or FastSeededRandom; "
+            f"cannot rebuild {randomizer.__class__.__name__} in a worker"
+        )
+
+    def _chunk_sizes(self, cnt):
+        """Split cnt rows into worker tasks.
+
+        The split depends only on cnt, never on the number of workers, so a
+        seeded job produces the same strings however many processes run it.
+        """
+        size = max(1, min(self.parallel_chunk_size, -(-cnt // 64)))
+        return [min(size, cnt - start) for start in range(0, cnt, size)]
+
+    def render_parallel(self, executor, sizes, first_index=0, **kwargs):
+        """Render chunks of the given sizes in executor; yield each chunk's list in order.
+
+        Every chunk is rendered in a worker process by a generator rebuilt
+        from the pattern with its own randomizer. When this generator is
+        seeded, chunk ``first_index + i`` is seeded with
+        ``derive_seed(seed, first_index + i)``, so seeded output is
+        reproducible. BufferedSecureRandom is re-created for every chunk so no
+        entropy buffer is ever shared. Sources passed as kwargs must be
+        picklable.
+
+        render_set() and render_list() use this when given ``workers``.
+        """
+        spec = self._worker_randomizer()
+        futures = [self._submit_chunk(executor, spec, first_index + i, size, kwargs) for i, size in enumerate(sizes)]
+        for future in futures:
+            yield future.result()
+
+    def _submit_chunk(self, executor, spec, index, size, kwargs):
+        return executor.submit(
+            _render_chunk, self.pattern, self.unique_attempts_factor, self.backend, spec, index, size, kwargs
+        )
+
+    def _pool_batches(self, chunk_size, workers, kwargs):
+        """Yield an endless, ordered stream of chunk_size batches rendered by
+        a pool of workers, keeping two tasks per worker in flight."""
+        spec = self._worker_randomizer()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: typing.Deque = deque()
+            try:
+                for index in itertools.count():
+                    pending.append(self._submit_chunk(executor, spec, index, chunk_size, kwargs))
+                    if len(pending) >= 2 * workers:
+                        yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _render_list_parallel(self, cnt, unique, progress_callback, workers, budget, partial, kwargs):
+        # a dict keeps first-seen order, so a seeded unique list is reproducible
+        rendered = {} if unique else []
+        total_attempts = 0
+        index = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while len(rendered) < cnt:
+                if total_attempts > cnt * self.unique_attempts_factor:
+                    raise StringGenerator.UniquenessError("couldn't satisfy uniqueness", partial=list(rendered))
+                if budget.spent(total_attempts):
+                    if partial:
+                        break
+                    raise StringGenerator.UniquenessError("generation budget spent", partial=list(rendered))
+                size = cnt - len(rendered)
+                if budget.limited:
+                    size = budget.size(min(size, self.budget_chunk_size * workers), total_attempts)
+                sizes = self._chunk_sizes(size)
+                for batch in self.render_parallel(executor, sizes, index, **kwargs):
+                    if unique:
+                        rendered.update(dict.fromkeys(batch))
+                    else:
+                        rendered.extend(batch)
+                    total_attempts += len(batch)
+                    if progress_callback and callable(progress_callback):
+                        progress_callback(len(rendered), cnt)
+                index += len(sizes)
+        return list(rendered)
 
     def __str__(self):
         return self.render()
 
     def __repr__(self):
         return f"{self.__class__.__name__}, {self.pattern}, {self.randomizer.__class__.__name__}"
+
+
+# A shared default randomizer for the module-level render(). SystemRandom keeps
+# no state of its own, so sharing it is safe.
+_default_randomizer = randomizer_factory(None)
+
+
+def compile(pattern, **options) -> StringGenerator:
+    """Return a StringGenerator for pattern, reusing a cached parse if possible.
+
+    Like ``re.compile``, the parse is cached at module level (see cache_info()
+    and purge()), so calling this inline does not re-tokenize and re-parse a
+    pattern seen before. Each returned generator has its own randomizer;
+    ``options`` are passed through to StringGenerator (uaf, randomizer, seed,
+    compile).
+    """
+    return StringGenerator(pattern, **options)
+
+
+def render(pattern, **sources) -> str:
+    """Render pattern once using the parse cache and the default randomizer.
+
+    ``strgen.render(r"[\\w]{8}")`` is the cached equivalent of
+    ``StringGenerator(r"[\\w]{8}").render()``.
+    """
+    return StringGenerator(pattern, randomizer=_default_randomizer).render(**sources)
+
+
+def cache_info() -> CacheInfo:
+    """Return hits, misses, maxsize and current size of the parse cache."""
+    return _parse_cache.info()
+
+
+def purge():
+    """Clear the parse cache and reset its statistics."""
+    _parse_cache.clear()
+
+
+def _render_chunk(pattern, uaf, backend, spec, index, cnt, kwargs):
+    """Worker process entry point for StringGenerator.render_parallel()."""
+    kind, klass, value = spec
+    if kind == "seed":
+        randomizer = random.Random(derive_seed(value, index))
+    elif kind == "buffered":
+        randomizer = klass(value)
+    elif kind == "fast":
+        randomizer = FastSeededRandom(None if value is None else derive_seed(value, index))
+    else:
+        randomizer = randomizer_factory(None)
+    return StringGenerator(pattern, uaf=uaf, randomizer=randomizer, backend=backend).render_many(cnt, **kwargs)
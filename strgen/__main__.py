@@ -0,0 +1,5 @@
+import sys
+
+from strgen.cli import main
+
+sys.exit(main())
@@ -0,0 +1,117 @@
+"""Command-line interface: stream generated strings to stdout or a file.
+
+    strgen PATTERN [-n COUNT] [--unique] [--seed S | --secure-buffered | --secure-packed]
+           [--workers N] [--out FILE] [--gzip] [--sep SEP] [--stats]
+
+Also available as ``python -m strgen``.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+from strgen import StringGenerator, __version__
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="strgen",
+        description="Generate randomized strings from a StringGenerator template.",
+    )
+    parser.add_argument("pattern", help="the template, e.g. '[\\u\\d]{12}'")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of strings to generate (default: 1)")
+    parser.add_argument("-u", "--unique", action="store_true", help="never output the same string twice")
+    randomizer = parser.add_mutually_exclusive_group()
+    randomizer.add_argument("--seed", type=int, help="seed for reproducible (not secure) output")
+    randomizer.add_argument(
+        "--secure-buffered",
+        action="store_true",
+        help="use BufferedSecureRandom: secure, and much faster than the default for large batches",
+    )
+    randomizer.add_argument(
+        "--secure-packed",
+        action="store_true",
+        help="use PackedSecureRandom: like --secure-buffered, but reads fewer random bytes per character",
+    )
+    parser.add_argument("-w", "--workers", type=int, help="render in this many processes")
+    parser.add_argument("-o", "--out", default="-", help="output file (default: stdout)")
+    parser.add_argument("-z", "--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--sep", default="\n", help="separator written after every string (default: newline)")
+    parser.add_argument("--chunk-size", type=int, default=65_536, help="strings rendered per batch")
+    parser.add_argument("--stats", action="store_true", help="print throughput and entropy statistics to stderr")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser
+
+
+def print_stats(sg, cnt, written, elapsed, workers, stream):
+    print(f"strings:   {cnt:,}", file=stream)
+    print(f"bytes:     {written:,}", file=stream)
+    print(f"seconds:   {elapsed:.3f}", file=stream)
+    if elapsed > 0:
+        print(f"rate:      {cnt / elapsed:,.0f} strings/s, {written / elapsed / 1e6:,.1f} MB/s", file=stream)
+    try:
+        bits = math.log2(sg.count())
+    except (NotImplementedError, ValueError):
+        bits = None
+    if bits is not None:
+        print(f"entropy:   {bits:.1f} bits/string, {bits * cnt / 8:,.0f} bytes in total", file=stream)
+    bytes_read = getattr(sg.randomizer, "bytes_read", None)
+    if bytes_read is not None and not (workers and workers > 1):
+        print(f"urandom:   {bytes_read:,} bytes read", file=stream)
+        per_symbol = sg.randomizer.bytes_per_symbol
+        if per_symbol is not None:
+            print(f"           {per_symbol:.3f} bytes used per character", file=stream)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    options = {}
+    if args.seed is not None:
+        options["seed"] = args.seed
+    elif args.secure_buffered:
+        options["randomizer"] = StringGenerator.BufferedSecureRandom()
+    elif args.secure_packed:
+        options["randomizer"] = StringGenerator.PackedSecureRandom()
+    try:
+        sg = StringGenerator(args.pattern, **options)
+    except StringGenerator.SyntaxError as e:
+        print(f"strgen: invalid pattern: {e}", file=sys.stderr)
+        return 2
+
+    if args.unique:
+        # fail before the output is opened, rather than leave a partial file
+        try:
+            space = sg.count()
+        except NotImplementedError:
+            space = None
+        if space is not None and args.count > space:
+            print(f"strgen: --unique: the template can only produce {space} distinct strings", file=sys.stderr)
+            return 1
+
+    out = sys.stdout.buffer if args.out == "-" else args.out
+    start = time.perf_counter()
+    try:
+        written = sg.render_to_file(
+            out,
+            args.count,
+            sep=args.sep,
+            unique=args.unique,
+            chunk_size=args.chunk_size,
+            compress="gzip" if args.gzip else None,
+            workers=args.workers,
+        )
+        if out is sys.stdout.buffer:
+            out.flush()
+    except StringGenerator.UniquenessError as e:
+        print(f"strgen: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # the reader went away (e.g. `strgen ... | head`); that is not an error,
+        # but stop Python from failing again when it flushes stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    if args.stats:
+        print_stats(sg, args.count, written, time.perf_counter() - start, args.workers, sys.stderr)
+    return 0
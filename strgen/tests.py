@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+import math
 import random
 import collections
 import statistics
@@ -10,6 +12,7 @@ from hypothesis.strategies import lists, integers
 
 import unittest
 from strgen import StringGenerator as SG
+from strgen import expected_duplicates, import_numpy
 
 SPECIAL_CHARACTERS = "{}[]()|&$-\\"
 
@@ -201,6 +204,434 @@ class TestSG(unittest.TestCase):
         self.assertTrue(isinstance(result, set))
         self.assertTrue(len(result) == set_length)
 
+    def test_render_list_unique(self):
+        """A unique list keeps draw order and reports progress per attempt."""
+        calls = []
+        result = SG(r"[\d]{2}", seed=5).render_list(80, unique=True, progress_callback=lambda i, n: calls.append(i))
+        assert len(set(result)) == len(result) == 80
+        sg = SG(r"[\d]{2}", seed=5)
+        expected = []
+        while len(expected) < 80:
+            s = sg.render()
+            if s not in expected:
+                expected.append(s)
+        assert result == expected
+        assert calls[-1] == 80 and len(calls) >= 80 and calls == sorted(calls)
+
+    def test_render_set_plan(self):
+        """render_set() sizes the request up front and picks a strategy."""
+        with self.assertRaises(SG.UniquenessError):
+            SG(r"[123]{2}").render_set(100)
+        for cnt, strategy in ((50, "sample"), (2000, "oversample"), (9900, "oversample"), (10000, "permute")):
+            sg = SG(r"[\d]{4}")
+            assert len(sg.render_set(cnt)) == cnt
+            assert sg.stats["strategy"] == strategy
+            assert sg.stats["space"] == 10000
+        assert sg.stats["draws"] == 10000
+        # no count() for sources: plain sampling
+        sg = SG(r"${a}[\d]{3}")
+        assert len(sg.render_set(20, a=["x", "y"])) == 20
+        assert sg.stats["strategy"] == "sample" and sg.stats["space"] is None
+        # count() overstates the distinct strings: give up rather than loop
+        with self.assertRaises(SG.UniquenessError):
+            SG(r"[aab]{2}").render_set(9)
+        assert SG(r"[\d]{4}", seed=3).render_set(3000) == SG(r"[\d]{4}", seed=3).render_set(3000)
+        assert expected_duplicates(1, 10) == 0.0
+        assert abs(expected_duplicates(10000, 10000) - 10000 / math.e) < 1
+
+    def test_render_set_huge_space(self):
+        """Spaces beyond the range of a float still plan and render."""
+        import io
+
+        sg = SG(r"[\w]{200}")
+        assert sg.count() > 10**308
+        assert len(sg.render_set(10)) == 10 and sg.stats["strategy"] == "sample"
+        assert len(sg.extend(set(), 5)) == 5
+        assert len(list(sg.render_unique_stream(20))) == 20
+        assert sg.render_set_to_file(io.BytesIO(), 10) == 10 * 201
+
+    def test_render_many(self):
+        """Batch rendering honours lengths, alternation and shuffles per row."""
+        assert SG(r"[\d]{4}").render_many(0) == []
+        assert SG(r"").render_many(3) == ["", "", ""]
+        assert SG(r"[a]{0}").render_many(2) == ["", ""]
+
+        result = SG(r"[\u]{3}-[\d]{2:5}").render_many(1000)
+        assert len(result) == 1000
+        for s in result:
+            head, tail = s.split("-")
+            assert len(head) == 3 and head.isupper()
+            assert 2 <= len(tail) <= 5 and tail.isdigit()
+        assert {len(s) for s in result} == {6, 7, 8, 9}
+
+        branches = collections.Counter(SG(r"a|b|c").render_many(9000))
+        assert set(branches) == {"a", "b", "c"}
+        assert all(2600 < c < 3400 for c in branches.values())
+
+        for s in SG(r"[\l]{6}&[\d]{2}", randomizer=SG.BufferedSecureRandom()).render_many(200):
+            assert len(s) == 8 and sum(c.isdigit() for c in s) == 2
+        assert len(set(SG(r"[\l]{6}&12").render_many(200))) > 1
+
+        assert SG(r"x${name}").render_many(3, name=lambda: "y") == ["xy"] * 3
+
+        assert SG(r"[\w]{12}", seed=9).render_many(50) == SG(r"[\w]{12}", seed=9).render_many(50)
+
+    def test_render_bytes(self):
+        """Bytes output draws the same randomness as str output, encoded."""
+        import io
+        import re
+
+        patterns = [r"[\w]{8}-[\d]{4}|x(a|b)", r"ab[\h]{4:8}&[\u]{2}${s}", r"é[α-ω]{3}", r"[\p]{1}", r""]
+        for pattern in patterns:
+            a, b = SG(pattern, seed=3), SG(pattern, seed=3)
+            assert [a.render(s=[1, 2]).encode() for _ in range(20)] == [b.render_bytes(s=[1, 2]) for _ in range(20)]
+            assert [s.encode() for s in a.render_many(20, s="x")] == b.render_many(20, encoding="utf-8", s="x")
+            assert [s.encode() for s in a.render_list(20, s="x")] == b.render_list(20, encoding="utf-8", s="x")
+            assert [s.encode() for s in a.iter_render(20, s="x")] == list(b.iter_render(20, encoding="utf-8", s="x"))
+
+        assert SG(r"[é]{2}").render_bytes("latin-1") == b"\xe9\xe9"
+        assert SG(r"x[é]{1}").render_many(2, encoding="utf-8") == [b"x\xc3\xa9"] * 2
+        for rng in (random.SystemRandom(), SG.BufferedSecureRandom()):
+            sg = SG(r"[\h]{2:6}-[\d]{1}", randomizer=rng)
+            for result in (sg.render_many(200, encoding="ascii"), [sg.render_bytes() for _ in range(50)]):
+                assert all(isinstance(s, bytes) and re.fullmatch(rb"[0-9a-fA-F]{2,6}-[0-9]", s) for s in result)
+        result = SG(r"[\d]{6}").render_list(100, unique=True, encoding="ascii")
+        assert len(set(result)) == 100 and all(isinstance(s, bytes) for s in result)
+
+        out = io.BytesIO()
+        written = SG(r"[\u]{4}é", seed=1).render_to_file(out, 3, sep=";", chunk_size=2, encoding="latin-1")
+        assert (
+            out.getvalue() == b";".join(s.encode("latin-1") for s in SG(r"[\u]{4}é", seed=1).iter_render(3, 2)) + b";"
+        )
+        assert written == len(out.getvalue())
+
+    @unittest.skipIf(import_numpy() is None, "numpy is not installed")
+    def test_numpy_backend(self):
+        pattern = r"key-[\u\d]{4:8}_[a-f]{2}"
+        result = SG(pattern, backend="numpy").render_many(2000)
+        assert len(result) == 2000
+        assert all(isinstance(s, str) for s in result)
+        for s in result:
+            head, tail = s[4:].split("_")
+            assert s.startswith("key-") and 4 <= len(head) <= 8 and len(tail) == 2
+        assert {len(s) for s in result} == {11, 12, 13, 14, 15}
+
+        array = SG(r"[Ā-Ԁ]{5}", backend="numpy").render_array(10)
+        assert array.shape == (10,) and all(len(s) == 5 for s in array.tolist())
+
+        a = SG(r"[\w]{16}", seed=3, backend="numpy")
+        b = SG(r"[\w]{16}", seed=3, backend="numpy")
+        assert a.render_set(100) == b.render_set(100)
+        assert len(a.render_list(50)) == 50
+        encoded = SG(r"é[Ā-Ԁ]{2}", seed=3, backend="numpy").render_many(20, encoding="utf-8")
+        assert encoded == [s.encode() for s in SG(r"é[Ā-Ԁ]{2}", seed=3, backend="numpy").render_many(20)]
+
+        # templates the backend cannot handle fall back to the Python path
+        assert SG(r"a|b", backend="numpy").render_many(5)[0] in "ab"
+        assert SG(r"${x}", backend="numpy").render_many(2, x="y") == ["y", "y"]
+        with self.assertRaises(ValueError):
+            SG(r"a&b", backend="numpy").render_array(2)
+        with self.assertRaises(ValueError):
+            SG(r"a", backend="fortran")
+
+    def test_numpy_backend_without_numpy(self):
+        """Without numpy the backend falls back to the pure-Python path."""
+        from unittest import mock
+
+        with mock.patch("strgen.import_numpy", return_value=None):
+            sg = SG(r"[\d]{6}", backend="numpy")
+            assert len(sg.render_set(100)) == 100
+            with self.assertRaises(ImportError):
+                sg.render_array(1)
+
+    def test_render_parallel(self):
+        """Worker processes split the job and seeded output is reproducible."""
+        pattern = r"[\w]{12}"
+        result = SG(pattern, seed=5).render_set(3000, workers=2)
+        assert len(result) == 3000
+        # chunking does not depend on the number of workers
+        assert result == SG(pattern, seed=5).render_set(3000, workers=3)
+
+        unique = SG(pattern, seed=5).render_list(3000, unique=True, workers=2)
+        assert len(unique) == len(set(unique)) == 3000
+        assert unique == SG(pattern, seed=5).render_list(3000, unique=True, workers=2)
+
+        progress = []
+        plain = SG(pattern).render_list(500, workers=2, progress_callback=lambda i, n: progress.append(i))
+        assert len(plain) == 500 and progress[-1] == 500
+
+        secure = SG(pattern, randomizer=SG.BufferedSecureRandom()).render_set(1000, workers=2)
+        assert len(secure) == 1000
+
+        with self.assertRaises(SG.UniquenessError):
+            SG(r"[123]").render_list(10, unique=True, workers=2)
+        with self.assertRaises(ValueError):
+            SG(pattern, randomizer=CustomRandomizer()).render_set(10, workers=2)
+        # a caller's seeded Random cannot be rebuilt, and must not silently become SystemRandom
+        with self.assertRaises(ValueError):
+            SG(pattern, randomizer=random.Random(5)).render_set(200, workers=2)
+        assert len(SG(pattern, randomizer=random.SystemRandom()).render_set(200, workers=2)) == 200
+        from unittest import mock
+
+        with mock.patch("random.SystemRandom", side_effect=Exception):
+            fallback = SG(pattern)
+        assert type(fallback.randomizer) is random.Random
+        assert len(fallback.render_set(200, workers=2)) == 200
+
+    def test_iter_render(self):
+        """iter_render streams strings or chunks, optionally unique, lazily."""
+        sg = SG(r"[\d]{6}")
+        assert len(list(sg.iter_render(25, chunk_size=10))) == 25
+        assert [len(c) for c in sg.iter_render(25, chunk_size=10, chunks=True)] == [10, 10, 5]
+
+        endless = sg.iter_render(chunk_size=7)
+        assert len([next(endless) for _ in range(100)]) == 100
+
+        unique = list(SG(r"[\d]{3}").iter_render(100, chunk_size=30, unique=True))
+        assert len(unique) == len(set(unique)) == 100
+
+        with self.assertRaises(SG.UniquenessError):
+            list(SG(r"[123]").iter_render(5, unique=True))
+        with self.assertRaises(SG.UniquenessError):
+            for _ in SG(r"[123]").iter_render(unique=True, chunk_size=5):
+                pass
+
+    def test_render_set_to_file(self):
+        """Exact unique output through sorted runs on disk."""
+        import io
+        import tempfile
+
+        def lines(out):
+            return out.getvalue().decode().split("\n")[:-1]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for order in ("sorted", "shuffled"):
+                for pattern, cnt in ((r"[\d]{4}", 10000), (r"[\d]{4}", 3000), (r"[\d]{5}", 400)):
+                    out = io.BytesIO()
+                    sg = SG(pattern)
+                    sg.render_set_to_file(out, cnt, max_memory=20000, order=order, chunk_size=500, tmpdir=tmp)
+                    result = lines(out)
+                    assert len(result) == len(set(result)) == cnt
+                    assert (result == sorted(result)) == (order == "sorted")
+                    assert sg.stats["runs"] > 1
+            assert os.listdir(tmp) == []
+
+        # strings with separators and escapes survive the run files
+        out = io.BytesIO()
+        SG(r"${x}[\d]{2}").render_set_to_file(out, 150, sep="\0", order="shuffled", x=["a\nb", "c\\n", "d\r"])
+        result = out.getvalue().decode().split("\0")[:-1]
+        assert len(set(result)) == 150
+        assert {s[:-2] for s in result} == {"a\nb", "c\\n", "d\r"}
+
+        outputs = []
+        for _ in range(2):
+            out = io.BytesIO()
+            SG(r"[\d]{3}", seed=8).render_set_to_file(out, 600, order="shuffled")
+            outputs.append(out.getvalue())
+        assert outputs[0] == outputs[1]
+
+        with self.assertRaises(SG.UniquenessError):
+            SG(r"[123]").render_set_to_file(io.BytesIO(), 4)
+        with self.assertRaises(ValueError):
+            SG(r"[123]").render_set_to_file(io.BytesIO(), 2, order="reversed")
+
+    def test_exclusion_store(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "issued.sgx")
+            with SG.ExclusionStore(path, capacity=10) as store:
+                items = [str(i) for i in range(3000)]
+                assert store.update(items) == 3000
+                assert store.update(items[:10] + ["new"]) == 1
+                assert not store.add("new")
+                assert len(store) == 3001
+                assert all(item in store for item in items)
+                assert not any(str(-i) in store for i in range(1, 3000))
+            # the file keeps the contents
+            with SG.ExclusionStore(path) as store:
+                assert len(store) == 3001 and "2999" in store and "x" not in store
+
+            bad = os.path.join(tmp, "bad")
+            with open(bad, "wb") as f:
+                f.write(b"not a store" * 10)
+            with self.assertRaises(ValueError):
+                SG.ExclusionStore(bad)
+
+    def test_exclude(self):
+        """Waves drawn with exclude= never overlap earlier ones."""
+        import tempfile
+
+        sg = SG(r"[\d]{3}")
+        with tempfile.TemporaryDirectory() as tmp, SG.ExclusionStore(os.path.join(tmp, "x.sgx")) as store:
+            waves = []
+            for cnt, strategy in ((100, "oversample"), (300, "oversample"), (400, "oversample"), (200, "permute")):
+                wave = sg.render_set(cnt, exclude=store)
+                assert len(wave) == cnt and sg.stats["strategy"] == strategy
+                store.update(wave)
+                waves.append(wave)
+            assert len(set().union(*waves)) == 1000
+            with self.assertRaises(SG.UniquenessError):
+                sg.render_set(1, exclude=store)
+
+        issued = set(sg.render_unique(600))
+        rest = sg.render_unique(400, exclude=issued)
+        assert len(rest) == 400 and not issued & set(rest)
+        assert sg.render_unique(0, exclude=issued) == []
+        with self.assertRaises(SG.UniquenessError):
+            sg.render_unique(401, exclude=issued)
+        assert not SG(r"[\w]{10}").render_set(500, exclude=issued) & issued
+
+        class Odd:
+            """Supports ``in`` but not len()."""
+
+            def __contains__(self, item):
+                return int(item) % 2 == 1
+
+        for result in (sg.render_set(50, exclude=Odd()), sg.extend(set(), 50, exclude=Odd())):
+            assert len(result) == 50 and all(int(s) % 2 == 0 for s in result)
+        assert all(int(s) % 2 == 0 for s in sg.render_unique(50, exclude=Odd()))
+
+    def test_extend(self):
+        """extend() and render_set(existing=) add exactly k new strings in place."""
+        sg = SG(r"[\d]{3}")
+        pool = sg.render_set(300)
+        assert sg.render_set(100, existing=pool) is pool and len(pool) == 400
+        new = sg.extend(pool, 500)
+        assert len(new) == len(set(new)) == 500 and len(pool) == 900
+        assert set(new) <= pool
+        with self.assertRaises(SG.UniquenessError):
+            sg.extend(pool, 101)
+        assert len(sg.extend(pool, 100)) == 100 and len(pool) == 1000
+
+        big = SG(r"[\u\d]{10}").render_set(2000)
+        before = set(big)
+        new = SG(r"[\u\d]{10}").extend(big, 50)
+        assert len(big) == 2050 and not before & set(new)
+
+        bloom = SG.BloomFilter(2000)
+        assert len(SG(r"[\d]{3}").extend(bloom, 400)) == 400 and len(bloom) == 400
+
+    def test_budget(self):
+        """timeout= and max_attempts= bound the unique APIs."""
+        import time
+
+        sg = SG(r"[\u\d]{12}")
+        assert len(sg.render_set(10**6, max_attempts=1234, partial=True)) == 1234
+        assert len(sg.render_list(10**6, unique=True, max_attempts=500, partial=True)) == 500
+        assert len(sg.extend(set(), 10**6, max_attempts=300, partial=True)) == 300
+        assert len(list(sg.iter_render(10**6, unique=True, max_attempts=700, partial=True))) == 700
+        assert len(list(sg.render_unique_stream(10**6, max_attempts=600, partial=True))) == 600
+
+        with self.assertRaises(SG.UniquenessError) as raised:
+            sg.render_set(10**6, max_attempts=100)
+        assert isinstance(raised.exception.partial, set) and len(raised.exception.partial) == 100
+        with self.assertRaises(SG.UniquenessError) as raised:
+            sg.render_list(10**6, unique=True, max_attempts=100)
+        assert len(raised.exception.partial) == 100
+        with self.assertRaises(SG.UniquenessError):
+            list(sg.iter_render(10**6, max_attempts=10))
+
+        start = time.monotonic()
+        result = sg.render_set(10**8, timeout=0.05, partial=True)
+        assert time.monotonic() - start < 1 and 0 < len(result) < 10**8
+
+        # the permute strategy is bounded too, chunk by chunk
+        sg = SG(r"[\d]{5}")
+        result = sg.render_set(10**5, max_attempts=2000, partial=True)
+        assert sg.stats["strategy"] == "permute" and len(result) == 2000
+        with self.assertRaises(SG.UniquenessError) as raised:
+            sg.render_set(10**5, exclude={"00000"}, max_attempts=2000)
+        assert len(raised.exception.partial) <= 2000
+        start = time.monotonic()
+        result = sg.render_set(10**5, timeout=0.01, partial=True)
+        assert time.monotonic() - start < 1 and 0 < len(result) < 10**5
+
+        # running out of distinct strings still raises, with what was found
+        with self.assertRaises(SG.UniquenessError) as raised:
+            SG(r"[12]").render_list(5, unique=True)
+        assert sorted(raised.exception.partial) == ["1", "2"]
+
+    def test_bloom_filter(self):
+        bloom = SG.BloomFilter(1000, fp_rate=1e-6)
+        assert bloom.add("a") and not bloom.add("a") and "a" in bloom
+        assert bloom.add_many(["b", "a", "c", "b"]) == ["b", "c"]
+        assert len(bloom) == 3
+        items = [str(i) for i in range(1000)]
+        bloom.add_many(items)
+        assert all(item in bloom for item in items)
+        assert sum(str(-i) in bloom for i in range(1, 10000)) < 5
+        with self.assertRaises(ValueError):
+            SG.BloomFilter(10, fp_rate=0)
+
+    def test_bloom_filter_without_numpy(self):
+        """The per-item and vectorized paths set the same bits."""
+        from unittest import mock
+
+        items = [str(i) for i in range(300)]
+        fast = SG.BloomFilter(500)
+        fast.add_many(items)
+        with mock.patch("strgen.import_numpy", return_value=None):
+            slow = SG.BloomFilter(500)
+            assert slow.add_many(items + items[:5]) == items
+        assert slow._array == fast._array
+
+    def test_render_unique_stream(self):
+        for dedupe in ("bloom", "set"):
+            for cnt, strategy in ((9000, "oversample"), (10000, "permute")):
+                sg = SG(r"[\d]{4}")
+                result = list(sg.render_unique_stream(cnt, dedupe=dedupe, chunk_size=1000))
+                assert len(result) == len(set(result)) == cnt
+                assert sg.stats["dedupe"] == dedupe and sg.stats["memory"] > 0
+                assert sg.stats["draws"] - sg.stats["rejected"] == cnt
+                assert sg.stats["strategy"] == strategy
+        sg = SG(r"[\d]{4}")
+        assert len(set(sg.render_unique_stream(3000))) == 3000
+        assert sg.stats["strategy"] == "oversample"
+        assert [len(c) for c in SG(r"[\w]{8}").render_unique_stream(25, chunk_size=10, chunks=True)] == [10, 10, 5]
+        with self.assertRaises(SG.UniquenessError):
+            next(SG(r"[123]").render_unique_stream(4))
+        with self.assertRaises(ValueError):
+            next(SG(r"[123]").render_unique_stream(2, dedupe="hash"))
+
+    def test_render_to_file(self):
+        """render_to_file writes separated records to paths and file objects."""
+        import gzip
+        import io
+        import tempfile
+
+        sg = SG(r"[\d]{4}")
+        out = io.BytesIO()
+        written = sg.render_to_file(out, 1000, chunk_size=300)
+        data = out.getvalue()
+        assert written == len(data) == 5000
+        assert all(len(line) == 4 for line in data.decode().splitlines())
+
+        text = io.StringIO()
+        assert SG(r"[\d]{3}").render_to_file(text, 900, sep=",", unique=True) == 3600
+        assert len(set(text.getvalue().rstrip(",").split(","))) == 900
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.txt.gz")
+            sg.render_to_file(path, 100, compress="gzip")
+            with gzip.open(path, "rt") as f:
+                assert len(f.read().splitlines()) == 100
+
+        buffer = io.BytesIO()
+        sg.render_to_file(buffer, 10, compress="gzip")
+        assert not buffer.closed
+        assert len(gzip.decompress(buffer.getvalue()).splitlines()) == 10
+
+        with self.assertRaises(ValueError):
+            sg.render_to_file(io.BytesIO(), 1, compress="zip")
+        # gzip writes bytes, which a text file object cannot take
+        text = io.StringIO()
+        with self.assertRaises(ValueError):
+            sg.render_to_file(text, 10, compress="gzip")
+        with self.assertRaises(ValueError):
+            sg.render_set_to_file(text, 10, compress="gzip")
+        assert text.getvalue() == ""
+
     def test_list_progress(self):
         """Check if the progress indicator actually works"""
 
@@ -357,10 +788,196 @@ class TestSG(unittest.TestCase):
         # each digit within a generous band around the 2000 expected
         assert all(1700 < c < 2300 for c in counts.values())
 
-        # Alphabets larger than one byte fall back to the standard path.
+        # Alphabets larger than one byte draw two-byte indices.
         big = SG(r"[Ā-Ԁ]{4}", randomizer=rng()).render()
         assert len(big) == 4
 
+    def test_buffered_randomizer_wide_alphabets(self):
+        """Two- and four-byte index paths in choices() are unbiased."""
+        rng = SG.BufferedSecureRandom(bufsize=1000)
+        for n in (300, 40000, 70000):
+            population = range(n)
+            draws = rng.choices(population, k=30000)
+            assert len(draws) == 30000 and all(0 <= d < n for d in draws)
+            # the top and bottom of the range are equally likely
+            low = sum(d < n // 2 for d in draws)
+            assert 14200 < low < 15800
+        # by residue, where rejection bias would show
+        counts = collections.Counter(d % 3 for d in rng.choices(range(40000), k=30000))
+        assert all(9500 < c < 10500 for c in counts.values())
+        assert rng.choices(range(300), k=0) == []
+
+        cjk = "".join(f"{chr(a)}-{chr(min(a + 9999, 0x9FFF))}" for a in range(0x4E00, 0xA000, 10000))
+        result = SG(f"[{cjk}]{{12}}", randomizer=rng).render_many(100)
+        assert all(len(s) == 12 and all("\u4e00" <= c <= "\u9fff" for c in s) for s in result)
+
+    def test_buffered_randomizer_methods(self):
+        """randint, choice and shuffle are byte-native and unbiased."""
+        for rng in (SG.BufferedSecureRandom(bufsize=64), SG.ThreadLocalSecureRandom(bufsize=64)):
+            counts = collections.Counter(rng.randint(1, 6) for _ in range(12000))
+            assert set(counts) == set(range(1, 7))
+            assert all(1700 < c < 2300 for c in counts.values())
+            assert {rng.randint(0, 70000) < 35000 for _ in range(100)} == {True, False}
+            assert rng.randint(5, 5) == 5
+            with self.assertRaises(ValueError):
+                rng.randint(2, 1)
+
+            counts = collections.Counter(rng.choice("abc") for _ in range(6000))
+            assert all(1700 < c < 2300 for c in counts.values())
+            with self.assertRaises(IndexError):
+                rng.choice([])
+
+            perms = collections.Counter()
+            for _ in range(6000):
+                x = [1, 2, 3]
+                rng.shuffle(x)
+                perms[tuple(x)] += 1
+            assert len(perms) == 6 and all(800 < c < 1200 for c in perms.values())
+            for n in (0, 1, 300):
+                x = list(range(n))
+                rng.shuffle(x)
+                assert sorted(x) == list(range(n))
+
+        result = SG(r"[\w]{10}&[\p]{2}|(a|b)", randomizer=SG.BufferedSecureRandom()).render_list(50)
+        assert all(len(s) in (1, 12) for s in result)
+
+    def test_translate_character_sets(self):
+        """Secure randomizers draw small latin-1 alphabets with bytes.translate."""
+        for rng in (random.SystemRandom(), SG.BufferedSecureRandom(bufsize=100), SG.ThreadLocalSecureRandom()):
+            for pattern, alphabet in ((r"[\h]{32}", set("0123456789abcdefABCDEF")), (r"[\d]{0:5}", set("0123456789"))):
+                sg = SG(pattern, randomizer=rng)
+                for result in (sg.render_list(200), sg.render_many(200), [sg.render() for _ in range(50)]):
+                    assert all(set(s) <= alphabet for s in result)
+                sg.compile()
+                assert all(set(s) <= alphabet for s in sg.render_list(200))
+            counts = collections.Counter(SG(r"[\d]{1000}", randomizer=rng).render())
+            assert len(counts) == 10 and all(50 < c < 150 for c in counts.values())
+        assert set(SG(r"[à-ÿ]{200}").render()) <= set(map(chr, range(0xE0, 0x100)))
+
+        def node(pattern):
+            return SG(pattern).seq.seq[0]
+
+        assert node(r"[\w]{4}")._translate is not None
+        # wider alphabets and non-latin-1 characters keep choices()
+        assert node(r"[α-ω]{4}")._translate is None
+        assert node("[\u0100-\u02ff]{4}")._translate is None
+        # seeded generators are unchanged
+        expected = "".join(random.Random(7).choices(node(r"[\w]").chars, k=12))
+        assert SG(r"[\w]{12}", seed=7).render() == expected
+
+    def test_fast_seeded_randomizer(self):
+        """FastSeededRandom is reproducible, uniform and usable in workers."""
+        pattern = r"[\w]{10}-[\d]{4}|x(a|b)&[\h]{2}"
+        for method in ("render_list", "render_many"):
+            a = getattr(SG(pattern, randomizer=SG.FastSeededRandom(5)), method)(200)
+            assert a == getattr(SG(pattern, randomizer=SG.FastSeededRandom(5)), method)(200)
+            assert a != getattr(SG(pattern, randomizer=SG.FastSeededRandom(6)), method)(200)
+        sg = SG(r"[\d]{4}", randomizer=SG.FastSeededRandom(5)).compile()
+        assert [sg.render() for _ in range(10)] == SG(r"[\d]{4}", randomizer=SG.FastSeededRandom(5)).render_list(10)
+
+        rng = SG.FastSeededRandom(1)
+        counts = collections.Counter(rng.choices("0123456789", k=30000))
+        assert all(2700 < c < 3300 for c in counts.values())
+        counts = collections.Counter(d % 3 for d in rng.choices(range(250), k=30000))
+        assert all(9500 < c < 10500 for c in counts.values())
+        assert rng.choices("ab", k=0) == [] and rng.randbytes(0) == b""
+        assert len(rng.choices(range(1000), k=5)) == 5
+        assert rng.choices("ab", weights=[0, 1], k=3) == ["b"] * 3
+        state = rng.getstate()
+        first = SG(r"[\w]{8}", randomizer=rng).render_list(5)
+        rng.setstate(state)
+        assert SG(r"[\w]{8}", randomizer=rng).render_list(5) == first
+
+        # worker chunks derive from the constructor's seed, whatever the pool size
+        result = SG(r"[\u\d]{8}", randomizer=SG.FastSeededRandom(9)).render_set(3000, workers=2)
+        assert result == SG(r"[\u\d]{8}", randomizer=SG.FastSeededRandom(9)).render_set(3000, workers=3)
+
+    def test_packed_secure_randomizer(self):
+        """PackedSecureRandom draws uniform characters from fewer random bytes."""
+        rng = SG.PackedSecureRandom(bufsize=1000)
+        assert rng.bytes_per_symbol is None
+        for n in (2, 10, 22, 300, 70000):
+            draws = rng.choices(range(n), k=30000)
+            assert len(draws) == 30000 and all(0 <= d < n for d in draws)
+            low = sum(d < n // 2 for d in draws)
+            assert 14200 < low < 15800 or n == 2
+        counts = collections.Counter(rng.choices("0123456789", k=30000))
+        assert all(2700 < c < 3300 for c in counts.values())
+        assert rng.choices("ab", k=0) == []
+
+        # about log2(10) / 8 bytes per digit, against a byte and more
+        packed, buffered = SG.PackedSecureRandom(), SG.BufferedSecureRandom()
+        for rng in (packed, buffered):
+            SG(r"[\d]{20}", randomizer=rng).render_list(1000)
+            assert rng.symbols_drawn == 20000
+        assert 0.41 < packed.bytes_per_symbol < 0.45
+        assert buffered.bytes_per_symbol > 1
+
+        # leftover digits are discarded with the buffer, e.g. after fork()
+        assert packed._digits
+        packed._reset()
+        assert not packed._digits
+        result = SG(r"[\w]{10}&[\p]{2}|(a|b)", randomizer=packed).render_list(50)
+        assert all(len(s) in (1, 12) for s in result)
+
+    def test_thread_local_secure_randomizer(self):
+        """Threads sharing one ThreadLocalSecureRandom never share bytes."""
+        import threading
+
+        rng = SG.ThreadLocalSecureRandom(bufsize=64)
+        assert isinstance(rng, SG.BufferedSecureRandom)
+        sg = SG(r"[\w]{32}", randomizer=rng)
+        results = []
+        buffers = []
+
+        def work():
+            results.extend(sg.render_list(500))
+            buffers.append(rng._local.buf)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(results) == len(set(results)) == 4000
+        assert all(len(s) == 32 for s in results)
+        # each thread drew from a buffer of its own
+        assert len({id(buf) for buf in buffers}) == 8
+        assert not hasattr(rng._local, "buf")
+        # statistics are kept per thread and summed, so no update is lost
+        assert rng.symbols_drawn == 4000 * 32
+        assert rng.bytes_used >= rng.symbols_drawn and rng.bytes_read >= rng.bytes_used
+        assert len(rng._counts) >= 8
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_buffered_randomizer_after_fork(self):
+        """A forked child never reuses bytes its parent had buffered."""
+        for rng in (SG.BufferedSecureRandom(), SG.ThreadLocalSecureRandom()):
+            rng._take(1)  # fill the buffer before forking
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:  # child
+                os.write(write_end, rng._take(32))
+                os._exit(0)
+            os.waitpid(pid, 0)
+            child_bytes = os.read(read_end, 32)
+            os.close(read_end)
+            os.close(write_end)
+            assert len(child_bytes) == 32
+            assert child_bytes != rng._take(32)
+
+    def test_buffered_randomizer_pid_fallback(self):
+        """Without fork hooks, a PID change discards the buffer on the next draw."""
+        from unittest import mock
+
+        for rng in (SG.BufferedSecureRandom(bufsize=64), SG.ThreadLocalSecureRandom(bufsize=64)):
+            first = rng._take(8)
+            rng._pid = -1  # pretend the buffer was filled by another process
+            with mock.patch("strgen._FORK_HOOKS", False):
+                assert rng._take(8) != first
+                assert rng._pid == os.getpid()
+
     def test_randomizer_is_per_instance(self):
         """Each generator owns its randomizer.
 
@@ -395,6 +1012,72 @@ class TestSG(unittest.TestCase):
         sg = SG(pattern, randomizer=CustomRandomizer())
         assert len(sg.render())
 
+    def test_compile(self):
+        """A compiled generator renders exactly what the tree walk renders."""
+        patterns = [
+            r"[\w]{8}-[\d]{4}",
+            r"[a-z][\c]{10}(.|_)[\c]{5:10}@[\c]{3:12}.(com|net|org)",
+            r"[\w]{10}&([\d]{10}|M3W9MF_lH3906I14O50)",
+            r"ab(cd(ef))g${names}h",
+            r"",
+        ]
+        for pattern in patterns:
+            plain = SG(pattern, seed=42)
+            compiled = SG(pattern, seed=42, compile=True)
+            for _ in range(50):
+                assert plain.render(names=["x", "y"]) == compiled.render(names=["x", "y"])
+
+        sg = SG(r"[\d]{4}")
+        assert sg.compile() is sg
+        assert len(sg.render_list(10)) == 10
+
+    def test_parse_cache(self):
+        """Generators share cached parse trees but keep their own randomizers."""
+        import strgen
+
+        strgen.purge()
+        assert strgen.cache_info().currsize == 0
+
+        a = strgen.compile(r"[\w]{8}-[\d]{4}", seed=1)
+        b = strgen.compile(r"[\w]{8}-[\d]{4}", seed=2)
+        info = strgen.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+        assert a.seq is b.seq
+        assert a.randomizer is not b.randomizer
+        assert a.render() == SG(r"[\w]{8}-[\d]{4}", seed=1).render()
+
+        assert strgen.render(r"x${name}", name=["y"]) == "xy"
+        assert strgen.cache_info().currsize == 2
+
+        strgen.purge()
+        info = strgen.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+
+    def test_parse_cache_subclass(self):
+        """A subclass that changes parsing does not share trees with the base class."""
+
+        class DigitsAreX(SG):
+            string_code = dict(SG.string_code, d="X")
+
+        for pattern in (r"[\d]{4}", r"[\d]{5}"):
+            # either class may parse the pattern first
+            if pattern.endswith("5}"):
+                assert SG(pattern).render().isdigit()
+            assert DigitsAreX(pattern).render() == "X" * int(pattern[-2])
+            assert SG(pattern).render().isdigit()
+
+    def test_parse_cache_eviction(self):
+        from strgen import ParseCache
+
+        cache = ParseCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.info().currsize == 2
+
     def test_dump(self):
         """make sure dump method works."""
         SG(r"[\w]{8}").dump()
@@ -427,6 +1110,96 @@ class TestSG(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             SG(r"[\d]{2}&[\d]{1}").count()
 
+    def test_unrank(self):
+        """unrank() numbers the sample space in a stable order."""
+        sg = SG(r"[ab]{1:2}|c")
+        assert [sg.unrank(i) for i in range(sg.count())] == ["a", "b", "aa", "ab", "ba", "bb", "c"]
+        assert SG(r"[A-F]{2}[\d]{3}").unrank(0) == "AA000"
+        assert SG(r"[A-F]{2}[\d]{3}").unrank(1234) == "AB234"
+        perms = SG(r"1&aab")
+        assert sorted(perms.unrank(i) for i in range(12)) == sorted(perms.render_set(12))
+        with self.assertRaises(IndexError):
+            SG(r"[ab]").unrank(2)
+        with self.assertRaises(NotImplementedError):
+            SG(r"${x}").unrank(0)
+
+    def test_iter_all(self):
+        """iter_all() enumerates the sample space lazily, in unrank() order."""
+        for pattern in (r"[A-F]{2}[\d]{3}", r"(ab|[cd]{1:2})[xy]-(1|2)", r"[ab]{0:2}", r"1&abc", r""):
+            sg = SG(pattern)
+            expected = [sg.unrank(i) for i in range(sg.count())]
+            assert list(sg.iter_all()) == expected
+            assert list(sg.iter_all(3, 17)) == expected[3:17]
+            assert list(sg.iter_all(len(expected) - 1, len(expected) + 10)) == expected[-1:]
+            # negative bounds count from the end, as in a slice
+            for start, stop in ((-1, None), (-5, -2), (-1000, 3), (2, -1), (0, -1000), (-3, 2)):
+                assert list(sg.iter_all(start, stop)) == expected[start:stop]
+
+        # shards put back together give the whole space
+        sg = SG(r"[\d]{3}[ab]")
+        shards = [list(sg.iter_all(start, start + 300)) for start in range(0, sg.count(), 300)]
+        assert sum(shards, []) == list(sg.iter_all())
+        assert len(set(sg.iter_all())) == 2000
+
+        # lazy: the first values of a huge space come back immediately
+        first = next(SG(r"[\w]{40}").iter_all(10**50))
+        assert len(first) == 40
+
+    def test_render_unique(self):
+        """render_unique() yields distinct strings, even for the whole space."""
+        for pattern in (r"[\d]{3}", r"[ab]{1:3}|[\u]{2}", r"1&abc"):
+            sg = SG(pattern)
+            result = sg.render_unique(sg.count())
+            assert len(set(result)) == len(result) == sg.count()
+            assert set(result) == {sg.unrank(i) for i in range(sg.count())}
+
+        assert SG(r"[\w]{10}", seed=4).render_unique(50) == SG(r"[\w]{10}", seed=4).render_unique(50)
+        sg = SG(r"[\d]{6}")
+        first = sg.render_unique(100, key="wave-key")
+        assert first[60:] == sg.render_unique(40, key="wave-key", start=60)
+        assert not set(first) & set(sg.render_unique(100, key="wave-key", start=100))
+        assert first != sg.render_unique(100, key="another-key")
+
+        with self.assertRaises(SG.UniquenessError):
+            SG(r"[123]").render_unique(4)
+
+    def test_permute_duck_typed_randomizer(self):
+        """The permute strategy only needs the randint/choice/choices/shuffle contract."""
+
+        class MinimalRandomizer:
+            def __init__(self, seed):
+                self._random = random.Random(seed)
+
+            def randint(self, a, b):
+                return self._random.randint(a, b)
+
+            def choice(self, seq):
+                return self._random.choice(seq)
+
+            def choices(self, population, k=1):
+                return self._random.choices(population, k=k)
+
+            def shuffle(self, x):
+                self._random.shuffle(x)
+
+        sg = SG(r"[\d]{2}", randomizer=MinimalRandomizer(1))
+        assert len(sg.render_set(100)) == 100 and sg.stats["strategy"] == "permute"
+        assert len(set(sg.render_unique(100))) == 100
+        assert len(set(sg.render_unique_stream(100))) == 100
+        assert len(sg.render_set(60)) == 60
+        first = SG(r"[\d]{2}", randomizer=MinimalRandomizer(2)).render_unique(100)
+        assert first == SG(r"[\d]{2}", randomizer=MinimalRandomizer(2)).render_unique(100)
+
+    def test_feistel_permutation(self):
+        for domain in (1, 2, 3, 5, 16, 1000):
+            permute = SG.FeistelPermutation(domain, b"key")
+            assert sorted(permute(i) for i in range(domain)) == list(range(domain))
+        # a domain wide enough to need several hash blocks per round
+        permute = SG.FeistelPermutation(3**700, b"key")
+        assert len({permute(i) for i in range(100)}) == 100
+        with self.assertRaises(IndexError):
+            SG.FeistelPermutation(10, b"key")(10)
+
     def test_probabilistic_or(self):
         d = SG("0|1|2|3|4|5|6|7|8|9").render_list(10000)
         d = [int(d) for d in d]
@@ -449,6 +1222,75 @@ class TestSG(unittest.TestCase):
         # ['1c', '2b', '1b', '2c', '2c', '3c', '3c', '2b', '1c', '1c']
 
 
+class TestCommandLine(unittest.TestCase):
+    def run_cli(self, *args):
+        import contextlib
+        import io
+
+        from strgen.cli import main
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main(list(args))
+        return status, stderr.getvalue()
+
+    def test_write_file(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.txt")
+            status, stderr = self.run_cli(
+                r"[\u\d]{8}", "-n", "500", "--unique", "--seed", "7", "--out", path, "--stats"
+            )
+            assert status == 0
+            with open(path) as f:
+                codes = f.read().splitlines()
+            assert len(codes) == len(set(codes)) == 500
+            assert "strings:   500" in stderr and "entropy:" in stderr
+
+            again = os.path.join(tmp, "again.txt")
+            self.run_cli(r"[\u\d]{8}", "-n", "500", "--unique", "--seed", "7", "--out", again)
+            with open(again) as f:
+                assert f.read().splitlines() == codes
+
+            # 0 is a seed like any other
+            zero = os.path.join(tmp, "zero.txt")
+            zero_again = os.path.join(tmp, "zero_again.txt")
+            self.run_cli(r"[\u\d]{8}", "-n", "50", "--seed", "0", "--out", zero)
+            self.run_cli(r"[\u\d]{8}", "-n", "50", "--seed", "0", "--out", zero_again)
+            with open(zero) as f, open(zero_again) as g:
+                assert f.read() == g.read()
+
+            status, stderr = self.run_cli(r"[\d]{4}", "-n", "10", "--secure-buffered", "--out", path, "--stats")
+            assert status == 0 and "urandom:" in stderr
+            status, stderr = self.run_cli(r"[\d]{4}", "-n", "10", "--secure-packed", "--out", path, "--stats")
+            assert status == 0 and "bytes used per character" in stderr
+
+    def test_errors(self):
+        import tempfile
+
+        status, stderr = self.run_cli(r"[a]{x}")
+        assert status == 2 and "invalid pattern" in stderr
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.txt")
+            status, stderr = self.run_cli(r"[12]", "-n", "5", "--unique", "--out", path)
+            assert status == 1 and "only produce 2 distinct strings" in stderr
+            assert not os.path.exists(path)
+
+    def test_module_entry_point(self):
+        import subprocess
+        import sys
+
+        result = subprocess.run(
+            [sys.executable, "-m", "strgen", r"ab[\d]{2}", "-n", "3"],
+            stdout=subprocess.PIPE,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        lines = result.stdout.decode().splitlines()
+        assert len(lines) == 3 and all(line.startswith("ab") and len(line) == 4 for line in lines)
+
+
 class TestParserRegressions(unittest.TestCase):
     """Regression tests for parser defects.
 